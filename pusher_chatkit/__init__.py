@@ -1 +1,2 @@
 from .pusher_chatkit import PusherChatKit
+from .async_pusher_chatkit import AsyncPusherChatKit
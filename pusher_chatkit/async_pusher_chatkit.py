@@ -0,0 +1,76 @@
+import functools
+import inspect
+
+from pusher_chatkit.backends import TornadoBackend
+from pusher_chatkit.concurrency import run_steps_async
+from pusher_chatkit.pagination import iterate_async
+from pusher_chatkit.pusher_chatkit import PusherChatKit
+
+
+# Computed locally without any request, these stay synchronous. The iter_*
+# methods return asynchronous iterators, for `async for`.
+LOCAL_METHODS = (
+    "generate_token",
+    "authenticate_user",
+    "deadline",
+    "add_listener",
+    "remove_listener",
+    "iter_users",
+    "iter_rooms",
+    "iter_room_messages",
+)
+
+
+def _coroutine(method):
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+
+        if inspect.isawaitable(result):
+            result = await result
+
+        return result
+
+    return wrapper
+
+
+class AsyncPusherChatKit(PusherChatKit):
+    """
+    PusherChatKit whose API methods and helpers are all native coroutines.
+
+    Requests are built by the PusherChatKit methods themselves and helpers
+    spanning several requests share their steps with it, only awaiting each
+    step instead of blocking on it.
+    """
+
+    _driver = staticmethod(run_steps_async)
+    _run = staticmethod(run_steps_async)
+    _iterate = staticmethod(iterate_async)
+
+    def __init__(
+            self,
+            instance_locator,
+            api_key,
+            backend=TornadoBackend,
+            circuit_breaker=None,
+            validator_cache=None,
+    ):
+        """
+        Instantiate a new AsyncPusherChatKit object.
+
+        :param instance_locator: Instance Locator for your ChatKit Instance.
+        :param api_key: API Key of your ChatKit Instance.
+        :param backend: Backend object you wish to use. Must return awaitables.
+        :param circuit_breaker: Options of the per-service CircuitBreaker
+            (failure_threshold, recovery_timeout, max_concurrency).
+        :param validator_cache: ValidatorCache used to revalidate GET responses
+            with ETag / Last-Modified, or True for a default one.
+        """
+        super().__init__(
+            instance_locator, api_key, backend, circuit_breaker, validator_cache
+        )
+
+
+for _name, _method in inspect.getmembers(PusherChatKit, inspect.isfunction):
+    if not _name.startswith("_") and _name not in LOCAL_METHODS:
+        setattr(AsyncPusherChatKit, _name, _coroutine(_method))
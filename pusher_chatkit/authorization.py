@@ -0,0 +1,246 @@
+import threading
+
+from functools import partial
+
+from pusher_chatkit import constants
+from pusher_chatkit.concurrency import gather_steps
+from pusher_chatkit.roles import role_name, role_scope
+
+
+EMPTY = frozenset()
+
+
+class RoleIndex(object):
+    def __init__(self):
+        """
+        In-memory index of roles, their permissions and their assignments.
+        """
+        self.permissions = {}
+        self.global_roles = {}
+        self.room_roles = {}
+        self.users = set()
+
+    def apply(self, event, arguments):
+        """
+        Updates the index after a successful PusherChatKit call.
+        """
+        if event in ("create_room_role", "create_global_role"):
+            scope = event.split("_")[1]
+            key = (scope, arguments["role_name"])
+            self.permissions[key] = frozenset(arguments["permissions"] or [])
+
+        elif event in ("delete_room_role", "delete_global_role"):
+            self.permissions.pop((event.split("_")[1], arguments["role_name"]), None)
+
+        elif event.startswith("update_permissions_for_"):
+            key = (event.split("_")[3], arguments["role_name"])
+            self.permissions[key] = (
+                self.permissions.get(key, EMPTY).union(
+                    arguments["permissions_to_add"] or []
+                )
+            ).difference(arguments["permissions_to_remove"] or [])
+
+        elif event == "assign_global_role_to_user":
+            self.global_roles[arguments["user_id"]] = arguments["role_name"]
+
+        elif event == "assign_room_role_to_user":
+            key = (arguments["user_id"], arguments["room_id"])
+            self.room_roles[key] = arguments["role_name"]
+
+        elif event == "remove_global_role_to_user":
+            self.global_roles.pop(arguments["user_id"], None)
+
+        elif event == "remove_room_role_to_user":
+            self.room_roles.pop((arguments["user_id"], arguments["room_id"]), None)
+
+        elif event == "load_user":
+            # Not a PusherChatKit call: roles fetched by AuthorizationEngine.load_user.
+            self.add_user_roles(arguments["user_id"], arguments["roles"])
+
+    def add_user_roles(self, user_id, roles):
+        self.users.add(user_id)
+
+        for role in roles or []:
+            if role_scope(role) == constants.ROOM_SCOPE:
+                self.room_roles[(user_id, role.get("room_id"))] = role_name(role)
+            else:
+                self.global_roles[user_id] = role_name(role)
+
+    def permissions_for(self, user_id, room_id=None):
+        """
+        :return: frozenset of the permissions the user has in the room, or
+            globally if `room_id` is None.
+        """
+        role = self.global_roles.get(user_id)
+        granted = self.permissions.get((constants.GLOBAL_SCOPE, role), EMPTY)
+
+        if room_id is not None:
+            role = self.room_roles.get((user_id, room_id))
+
+            if role is not None:
+                room_granted = self.permissions.get((constants.ROOM_SCOPE, role), EMPTY)
+                granted = granted | room_granted
+
+        return granted
+
+
+class AuthorizationEngine(object):
+    def __init__(self, chatkit, user_ids=(), refresh_interval=300, max_concurrency=10):
+        """
+        Answers permission checks from an in-memory index of roles.
+
+        The index is loaded with `load`, kept current by listening to role
+        changes made through `chatkit`, and can be reloaded periodically in
+        a background thread with `start`.
+
+        :param chatkit: PusherChatKit (or AsyncPusherChatKit, without `start`).
+        :param user_ids: Users whose role assignments are loaded.
+        :param refresh_interval: Seconds between background reloads.
+        :param max_concurrency: Maximum number of requests in flight while loading.
+        """
+        self.chatkit = chatkit
+        self.user_ids = set(user_ids)
+        self.refresh_interval = refresh_interval
+        self.max_concurrency = max_concurrency
+        self.index = RoleIndex()
+
+        self._lock = threading.Lock()
+        # Events received during each load in progress, one list per load.
+        self._pending = {}
+        self._stopped = threading.Event()
+        self._thread = None
+
+        chatkit.add_listener(self._on_event)
+
+    def can(self, user_id, room_id, permission):
+        """
+        :param user_id: Id of the user.
+        :param room_id: Id of the room, or None for global permissions.
+        :param permission: Permission name, e.g. 'message:create'.
+
+        :return: True if the user's roles grant the permission.
+        """
+        return permission in self.index.permissions_for(user_id, room_id)
+
+    def load(self, user_ids=None):
+        """
+        (Re)loads roles, permissions and the assignments of the users.
+
+        :param user_ids: Users to add to the loaded ones.
+        """
+        if user_ids:
+            self.user_ids.update(user_ids)
+
+        return self.chatkit._run(self._load_steps(set(self.user_ids)))
+
+    def load_user(self, user_id):
+        """
+        Loads the role assignments of one more user into the current index.
+        """
+        return self.chatkit._run(self._load_user_steps(user_id))
+
+    def _load_steps(self, user_ids):
+        pending = []
+
+        with self._lock:
+            self._pending[id(pending)] = pending
+
+        try:
+            calls = {("roles",): self.chatkit.list_all_roles}
+            calls.update(
+                {
+                    ("user", user_id): partial(self.chatkit.list_user_roles, user_id)
+                    for user_id in user_ids
+                }
+            )
+            fetched = yield from gather_steps(calls, self.max_concurrency)
+
+            roles = fetched[("roles",)] or []
+            missing = [
+                (role_scope(role), role_name(role))
+                for role in roles
+                if "permissions" not in role
+            ]
+            permissions = yield from gather_steps(
+                {
+                    (scope, name): partial(
+                        getattr(
+                            self.chatkit, "list_permissions_for_{}_role".format(scope)
+                        ),
+                        name,
+                    )
+                    for scope, name in missing
+                },
+                self.max_concurrency,
+            )
+
+            index = RoleIndex()
+
+            for role in roles:
+                key = (role_scope(role), role_name(role))
+                index.permissions[key] = frozenset(
+                    permissions.get(key, role.get("permissions")) or []
+                )
+
+            for user_id in user_ids:
+                index.add_user_roles(user_id, fetched[("user", user_id)])
+
+        except Exception:
+            with self._lock:
+                del self._pending[id(pending)]
+            raise
+
+        with self._lock:
+            # Changes made while loading may be missing from what was fetched.
+            for event, arguments in pending:
+                index.apply(event, arguments)
+
+            del self._pending[id(pending)]
+            self.index = index
+
+        return index
+
+    def _load_user_steps(self, user_id):
+        roles = yield self.chatkit.list_user_roles(user_id)
+
+        with self._lock:
+            self.user_ids.add(user_id)
+            # Loads in progress fetched their own users only, so they must
+            # apply the roles too or the user would be missing once they end.
+            self._apply("load_user", {"user_id": user_id, "roles": roles})
+
+    def _on_event(self, event, arguments, result):
+        with self._lock:
+            self._apply(event, arguments)
+
+    def _apply(self, event, arguments):
+        # Called with the lock held.
+        self.index.apply(event, arguments)
+
+        for pending in self._pending.values():
+            pending.append((event, arguments))
+
+    def start(self):
+        """
+        Loads the index, then reloads it every `refresh_interval` seconds in a
+        daemon thread. Requires a synchronous PusherChatKit.
+        """
+        self.load()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _refresh_loop(self):
+        while not self._stopped.wait(self.refresh_interval):
+            try:
+                self.load()
+            except Exception:
+                # Keep serving the last index; the next refresh will retry.
+                pass
@@ -0,0 +1,186 @@
+import atexit
+import gzip
+import inspect
+import json
+import threading
+import time
+
+from urllib.parse import urlsplit
+
+from pusher_chatkit.lazy import LazyList
+from pusher_chatkit.exceptions import (
+    PusherBadAuth,
+    PusherBadRequest,
+    PusherBadStatus,
+    PusherForbidden,
+    PusherNotFound,
+)
+
+
+ERROR_STATUSES = (
+    (PusherBadRequest, 400),
+    (PusherBadAuth, 401),
+    (PusherForbidden, 403),
+    (PusherNotFound, 404),
+)
+
+# Status recorded for errors that never got a response (timeouts, connection errors).
+NO_RESPONSE = 599
+
+# Response headers recorded, so that replayed 304s are answered by a ValidatorCache.
+RECORDED_HEADERS = ('ETag', 'Last-Modified')
+
+
+def request_key(method, endpoint):
+    """
+    Key matching recorded and replayed requests: the method and the endpoint
+    without its scheme and host.
+    """
+    url = urlsplit(endpoint)
+    return '{} {}{}'.format(method, url.path, '?' + url.query if url.query else '')
+
+
+def _error_status(error):
+    for error_class, status in ERROR_STATUSES:
+        if isinstance(error, error_class):
+            return status
+
+    if isinstance(error, PusherBadStatus):
+        status = str(error).split(':', 1)[0]
+        if status.isdigit():
+            return int(status)
+
+    return NO_RESPONSE
+
+
+def _encode_response(result):
+    # Lazy responses are recorded as received, without decoding them.
+    if isinstance(result, LazyList):
+        return result.raw.decode('utf8')
+
+    return json.dumps(result)
+
+
+def _decode_text(body):
+    if body is None:
+        return ''
+
+    if isinstance(body, bytes):
+        return body.decode('utf8', 'replace')
+
+    return body
+
+
+def _decode_body(body):
+    if isinstance(body, bytes):
+        body = body.decode('utf8')
+
+    if isinstance(body, str):
+        try:
+            return json.loads(body)
+        except ValueError:
+            pass
+
+    return body
+
+
+class RecordingBackend(object):
+
+    def __init__(self, backend, path):
+        """
+        Wraps another backend and records every request to a gzipped NDJSON
+        file, for `ReplayBackend`.
+
+        Each line holds the method, endpoint, body, status, raw response,
+        validator headers and latency of a request. Backends accepting an
+        `on_response` hook have their responses recorded as received; for
+        others, successes are recorded as 200 with the re-encoded result.
+        Use functools.partial to pass it to PusherChatKit:
+
+            partial(RecordingBackend, RequestsBackend, 'traffic.ndjson.gz')
+
+        :param backend: Backend class doing the actual requests.
+        :param path: Path of the recording.
+        """
+        self.backend = backend()
+        self._hooked = 'on_response' in inspect.signature(
+            self.backend.process_request).parameters
+        self.path = path
+        self._file = gzip.open(path, 'wt', encoding='utf8')
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def _record(self, method, endpoint, body, started, responses, result=None,
+                error=None):
+        if responses:
+            status, headers, response = responses[0]
+        elif error is None:
+            status, headers, response = 200, {}, _encode_response(result)
+        else:
+            status, headers, response = _error_status(error), {}, str(error)
+
+        entry = {
+            'method': method,
+            'endpoint': endpoint,
+            'body': _decode_body(body),
+            'status': status,
+            'response': _decode_text(response),
+            'latency': round(time.monotonic() - started, 6),
+        }
+
+        if headers:
+            entry['headers'] = headers
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+
+    def process_request(self, method, endpoint, body=None, token=None, **options):
+        started = time.monotonic()
+        # Raw responses, filled by the wrapped backend.
+        responses = []
+
+        if self._hooked:
+            def on_response(status, headers, response):
+                responses.append((status, {
+                    name: headers.get(name)
+                    for name in RECORDED_HEADERS if headers.get(name)
+                }, response))
+
+            options['on_response'] = on_response
+
+        try:
+            result = self.backend.process_request(
+                method, endpoint, body, token, **options)
+        except Exception as exc:
+            self._record(method, endpoint, body, started, responses, error=exc)
+            raise
+
+        if inspect.isawaitable(result):
+            return self._record_async(
+                method, endpoint, body, started, responses, result)
+
+        self._record(method, endpoint, body, started, responses, result)
+
+        return result
+
+    async def _record_async(self, method, endpoint, body, started, responses,
+                            awaitable):
+        try:
+            result = await awaitable
+        except Exception as exc:
+            self._record(method, endpoint, body, started, responses, error=exc)
+            raise
+
+        self._record(method, endpoint, body, started, responses, result)
+
+        return result
+
+    def process_upload(self, url, upload, **options):
+        return self.backend.process_upload(url, upload, **options)
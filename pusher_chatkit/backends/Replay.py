@@ -0,0 +1,137 @@
+import asyncio
+import gzip
+import json
+import threading
+import time
+
+from pusher_chatkit.backends.Recording import request_key
+from pusher_chatkit.client import process_response
+from pusher_chatkit.exceptions import PusherDeadlineExceeded
+
+
+class ReplayBackend(object):
+
+    def __init__(self, path, latency_scale=0.0, asynchronous=False, strict=False):
+        """
+        Serves responses from a `RecordingBackend` recording, without network.
+
+        Requests are matched on method and endpoint path. Matching responses
+        are served in recorded order and the last one is repeated once they
+        run out, so a short recording can drive a longer benchmark. Responses
+        are parsed with `process_response`, like a real backend would.
+        Recorded 304s are answered by the client's ValidatorCache, or, when it
+        does not hold the response, with the response recorded before them.
+
+        :param path: Path of the recording.
+        :param latency_scale: Multiplier of the recorded latencies; 0 replays
+            at full speed, 1 reproduces them.
+        :param asynchronous: Return awaitables, for AsyncPusherChatKit.
+        :param strict: Raise LookupError for requests missing from the recording
+            instead of answering 404.
+        """
+        self.latency_scale = latency_scale
+        self.asynchronous = asynchronous
+        self.strict = strict
+        self._entries = {}
+        self._positions = {}
+        # id() of recorded 304s -> the successful response they validated.
+        self._validated = {}
+        self._lock = threading.Lock()
+        last_success = {}
+
+        with gzip.open(path, 'rt', encoding='utf8') as fd:
+            for line in fd:
+                entry = json.loads(line)
+                key = request_key(entry['method'], entry['endpoint'])
+                self._entries.setdefault(key, []).append(entry)
+
+                if 200 <= entry['status'] <= 299:
+                    last_success[key] = entry
+                elif entry['status'] == 304 and key in last_success:
+                    self._validated[id(entry)] = last_success[key]
+
+    def _next_entry(self, method, endpoint):
+        key = request_key(method, endpoint)
+
+        with self._lock:
+            entries = self._entries.get(key)
+
+            if not entries:
+                if self.strict:
+                    raise LookupError('No recorded response for {}'.format(key))
+                return None
+
+            position = self._positions.get(key, 0)
+            self._positions[key] = min(position + 1, len(entries) - 1)
+
+        return entries[position]
+
+    def _respond(self, entry, endpoint, token=None, cache=None, delay=0,
+                 timeout=None, lazy=False, on_response=None):
+        if timeout and delay > timeout:
+            raise PusherDeadlineExceeded(
+                'Recorded latency of {:.3f}s exceeds the deadline'.format(delay))
+
+        if entry is None:
+            return process_response(404, '')
+
+        status = entry['status']
+        headers = entry.get('headers', {})
+        response = entry['response']
+
+        if on_response:
+            on_response(status, headers, response)
+
+        cached = cache.validators(endpoint, token, lazy)[1] if cache else None
+
+        # Without the cached response, answer with the one the 304 validated.
+        if status == 304 and cached is None and id(entry) in self._validated:
+            validated = self._validated[id(entry)]
+            status = validated['status']
+            headers = validated.get('headers', {})
+            response = validated['response']
+
+        if cache:
+            return cache.process_response(
+                endpoint, token, status, headers, response, lazy=lazy,
+                cached=cached)
+
+        return process_response(status, response, lazy=lazy)
+
+    def _delay(self, entry):
+        return entry['latency'] * self.latency_scale if entry else 0
+
+    def process_request(self, method, endpoint, body=None, token=None, cache=None,
+                        timeout=None, lazy=False, on_response=None):
+        entry = self._next_entry(method, endpoint)
+
+        if self.asynchronous:
+            return self._process_request_async(
+                entry, endpoint, token, cache, timeout, lazy, on_response)
+
+        delay = self._delay(entry)
+
+        if delay:
+            time.sleep(min(delay, timeout) if timeout else delay)
+
+        return self._respond(
+            entry, endpoint, token, cache, delay, timeout, lazy, on_response)
+
+    async def _process_request_async(self, entry, endpoint, token, cache, timeout,
+                                     lazy, on_response):
+        delay = self._delay(entry)
+
+        if delay:
+            await asyncio.sleep(min(delay, timeout) if timeout else delay)
+
+        return self._respond(
+            entry, endpoint, token, cache, delay, timeout, lazy, on_response)
+
+    def process_upload(self, url, upload, timeout=None):
+        if self.asynchronous:
+            return self._process_upload_async()
+
+        return None
+
+    async def _process_upload_async(self):
+        return None
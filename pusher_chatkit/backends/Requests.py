@@ -1,27 +1,169 @@
+import threading
+import time
+import weakref
+
 import requests
-import json
 
 
-from pusher_chatkit.client import process_response
+from pusher_chatkit.client import encode_body, process_response
+from pusher_chatkit.exceptions import PusherDeadlineExceeded
+
+
+class _DeadlineReader(object):
+    def __init__(self, fd, length, at, url):
+        """
+        File object raising PusherDeadlineExceeded when read past `at`, so
+        sending a streamed body stops at the deadline.
+        """
+        self.fd = fd
+        self.length = length
+        self.at = at
+        self.url = url
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return iter(lambda: self.read(RequestsBackend.BLOCK_SIZE), b'')
+
+    def read(self, size=-1):
+        if time.monotonic() > self.at:
+            raise PusherDeadlineExceeded(
+                'Deadline exceeded sending {}'.format(self.url))
+
+        return self.fd.read(size)
 
 
 class RequestsBackend(object):
+    # Size of the blocks bodies are read and sent in, under a deadline.
+    BLOCK_SIZE = 65536
+
+    def __init__(self, timeout=30):
+        """
+        Safe to share between threads: `requests.Session` is not, so each
+        thread gets its own session, and keeps its connections alive.
 
-    def __init__(self):
+        :param timeout: Default timeout of a request, in seconds.
+        """
         self.http = requests
-        self.session = requests.Session()
+        self.timeout = timeout
+        self._local = threading.local()
+        # Sessions of threads that are gone are dropped along with them.
+        self._sessions = weakref.WeakSet()
+        self._lock = threading.Lock()
 
-    def process_request(self, method, endpoint, body=None, token=None):
-        headers = {'Content-Type': 'application/json'}
+    @property
+    def session(self):
+        """
+        :return: The `requests.Session` of the current thread.
+        """
+        session = getattr(self._local, 'session', None)
+
+        if session is None:
+            session = self._local.session = requests.Session()
+
+            with self._lock:
+                self._sessions.add(session)
+
+        return session
+
+    def close(self):
+        """
+        Closes the sessions of all threads, and their connections.
+        """
+        with self._lock:
+            sessions = list(self._sessions)
+            self._sessions.clear()
+
+        for session in sessions:
+            session.close()
+
+        self._local = threading.local()
+
+    def process_request(self, method, endpoint, body=None, token=None, cache=None,
+                        timeout=None, lazy=False, on_response=None):
+        """
+        :param on_response: Optional callable(status, headers, body) called
+            with the raw response before it is processed.
+        """
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+        }
 
         if token:
             headers['Authorization'] = 'Bearer {}'.format(token['token'])
 
-        resp = self.session.request(
-            method,
-            endpoint,
-            headers=headers,
-            data=json.dumps(body) if body else None,
-            timeout=30)
+        cached = None
+
+        if cache:
+            validators, cached = cache.validators(endpoint, token, lazy)
+            headers.update(validators)
+
+        resp, content = self._send(
+            method, endpoint, timeout, headers=headers, data=encode_body(body))
+
+        if on_response:
+            on_response(resp.status_code, resp.headers, content)
+
+        # Raw bytes: json parses them directly, skipping charset detection.
+        if cache:
+            return cache.process_response(
+                endpoint, token, resp.status_code, resp.headers, content,
+                lazy=lazy, cached=cached)
+
+        return process_response(resp.status_code, content, lazy=lazy)
+
+    def process_upload(self, url, upload, timeout=None):
+        # Requests streams file objects in blocks instead of reading them whole.
+        with upload.open() as fd:
+            if timeout:
+                fd = _DeadlineReader(
+                    fd, upload.content_length, time.monotonic() + timeout, url)
+
+            resp, content = self._send(
+                'PUT', url, timeout, headers=upload.headers, data=fd)
+
+        return process_response(resp.status_code, content)
+
+    def _send(self, method, url, timeout=None, **kwargs):
+        """
+        Sends a request, its timeout capped by what is left of the deadline.
+
+        `requests` applies a timeout to connecting and to each read from the
+        socket, not to the whole request, so the body is read in blocks and
+        the deadline checked between them: a request overruns its deadline
+        by at most one read. `process_upload` bounds sending the file the
+        same way.
+
+        :return: tuple of (response, body as bytes).
+        """
+        at = time.monotonic() + timeout if timeout else None
+
+        try:
+            resp = self.session.request(
+                method,
+                url,
+                timeout=min(timeout, self.timeout) if timeout else self.timeout,
+                stream=True,
+                **kwargs)
+
+            with resp:
+                if at is None:
+                    return resp, resp.content
+
+                blocks = []
+
+                for block in resp.iter_content(self.BLOCK_SIZE):
+                    if time.monotonic() > at:
+                        raise PusherDeadlineExceeded(
+                            'Deadline exceeded reading {}'.format(url))
+
+                    blocks.append(block)
 
-        return process_response(resp.status_code, resp.text)
+                return resp, b''.join(blocks)
+        except requests.Timeout:
+            if timeout and timeout < self.timeout:
+                raise PusherDeadlineExceeded(
+                    'Deadline exceeded waiting for {}'.format(url))
+            raise
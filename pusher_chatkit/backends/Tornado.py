@@ -1,42 +1,183 @@
-import json
+import datetime
+import time
+
 import tornado
 import tornado.httpclient
+import tornado.locks
+import tornado.simple_httpclient
+
+import tornado.util
 
-from tornado.concurrent import Future
-from pusher_chatkit.client import process_response
+from pusher_chatkit.client import encode_body, process_response
+from pusher_chatkit.exceptions import PusherDeadlineExceeded
 
 
 class TornadoBackend(object):
 
-    def __init__(self):
-        self.http = tornado.httpclient.AsyncHTTPClient()
+    def __init__(self, max_clients=10, use_curl=False, connect_timeout=10,
+                 request_timeout=30):
+        """
+        :param max_clients: Maximum number of concurrent requests. Further
+            requests wait for a free slot, see `stats`.
+        :param use_curl: Use `CurlAsyncHTTPClient` (requires pycurl) instead
+            of `SimpleAsyncHTTPClient`.
+        :param connect_timeout: Timeout for establishing a connection, in seconds.
+        :param request_timeout: Timeout for the whole request, in seconds.
+        """
+        self.max_clients = max_clients
+        self.use_curl = use_curl
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+
+        self.queued = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+        self._slots = tornado.locks.Semaphore(max_clients)
+        self._http = None
+        self._upload_http = None
+
+    @property
+    def http(self):
+        # Created on first use so the client binds to the running IOLoop.
+        if self._http is None:
+            if self.use_curl:
+                from tornado.curl_httpclient import CurlAsyncHTTPClient
+                http_class = CurlAsyncHTTPClient
+            else:
+                http_class = tornado.simple_httpclient.SimpleAsyncHTTPClient
+
+            self._http = http_class(force_instance=True, max_clients=self.max_clients)
+
+        return self._http
+
+    @property
+    def upload_http(self):
+        # The curl client cannot stream a body_producer, uploads always go
+        # through the simple client.
+        if not self.use_curl:
+            return self.http
+
+        if self._upload_http is None:
+            self._upload_http = tornado.simple_httpclient.SimpleAsyncHTTPClient(
+                force_instance=True, max_clients=self.max_clients)
+
+        return self._upload_http
+
+    @property
+    def stats(self):
+        """
+        Connection pool usage.
+
+        `queued` is the number of requests currently waiting for a slot, and
+        `total_wait`/`max_wait` the time (in seconds) requests spent waiting.
+        """
+        return {
+            'max_clients': self.max_clients,
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'requests': self.requests,
+            'total_wait': self.total_wait,
+            'max_wait': self.max_wait,
+        }
 
-    def process_request(self, method, endpoint, body=None, token=None):
+    async def _fetch(self, http, request, cache=None, token=None, timeout=None,
+                     lazy=False, on_response=None, cached=None):
+        started = time.monotonic()
+        self.queued += 1
+
+        try:
+            await self._slots.acquire(
+                datetime.timedelta(seconds=timeout) if timeout else None)
+        except tornado.util.TimeoutError:
+            raise PusherDeadlineExceeded(
+                'Deadline exceeded waiting for a client slot')
+        finally:
+            self.queued -= 1
+
+        waited = time.monotonic() - started
+
+        if timeout:
+            # Whatever is left of the deadline after waiting for a slot.
+            left = max(timeout - waited, 0.001)
+            request.connect_timeout = min(self.connect_timeout, left)
+            request.request_timeout = min(self.request_timeout, left)
+
+        self.requests += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.in_flight += 1
+
+        try:
+            response = await http.fetch(request, raise_error=False)
+        except tornado.httpclient.HTTPClientError as e:
+            # 599 is Tornado's code for a connection or timeout error.
+            if timeout and e.code == 599 and \
+                    time.monotonic() - started >= timeout:
+                raise PusherDeadlineExceeded(
+                    'Deadline exceeded waiting for {}'.format(request.url))
+            raise
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+        if on_response:
+            on_response(response.code, response.headers, response.body)
+
+        if cache:
+            return cache.process_response(
+                request.url, token, response.code, response.headers,
+                response.body, response.error, lazy, cached)
+
+        return process_response(
+            response.code, response.body, response.error, lazy)
+
+    async def process_request(self, method, endpoint, body=None, token=None,
+                              cache=None, timeout=None, lazy=False,
+                              on_response=None):
+        """
+        :param on_response: Optional callable(status, headers, body) called
+            with the raw response before it is processed.
+        """
         headers = {'Content-Type': 'application/json'}
-        future = Future()
 
         if token:
             headers['Authorization'] = 'Bearer {}'.format(token['token'])
 
-        def process_response_future(response):
-            if response.exception() is not None:
-                future.set_exception(response.exception())
+        cached = None
 
-            else:
-                result = response.result()
-                code = result.code
-                body = (result.body or b'').decode('utf8')
-                future.set_result(process_response(code, body, result.error))
+        if cache:
+            validators, cached = cache.validators(endpoint, token, lazy)
+            headers.update(validators)
 
         request = tornado.httpclient.HTTPRequest(
             endpoint,
             method=method,
-            body=json.dumps(body) if body else None,
+            body=encode_body(body),
             headers=headers,
-            request_timeout=30)
+            decompress_response=True,
+            connect_timeout=self.connect_timeout,
+            request_timeout=self.request_timeout)
+
+        return await self._fetch(
+            self.http, request, cache, token, timeout, lazy, on_response,
+            cached)
+
+    async def process_upload(self, url, upload, timeout=None):
+        with upload.open() as fd:
 
-        response_future = self.http.fetch(request, raise_error=False)
-        response_future.add_done_callback(process_response_future)
+            async def body_producer(write):
+                for chunk in upload.iter_chunks(fd):
+                    await write(chunk)
 
-        return future
+            request = tornado.httpclient.HTTPRequest(
+                url,
+                method='PUT',
+                body_producer=body_producer,
+                headers=upload.headers,
+                connect_timeout=self.connect_timeout,
+                request_timeout=self.request_timeout)
 
+            return await self._fetch(self.upload_http, request, timeout=timeout)
@@ -1,2 +1,4 @@
 from .Requests import RequestsBackend
 from .Tornado import TornadoBackend
+from .Recording import RecordingBackend
+from .Replay import ReplayBackend
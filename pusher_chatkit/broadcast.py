@@ -0,0 +1,43 @@
+class BroadcastResult(object):
+    def __init__(self, message_ids=None, errors=None):
+        """
+        Outcome of a broadcast, per room.
+
+        Pass it back as `resume` to `PusherChatKit.broadcast_message` to
+        retry the failed rooms without sending twice to the others.
+
+        :param message_ids: dict of room_id -> message_id for delivered rooms.
+        :param errors: dict of room_id -> Exception for failed rooms.
+        """
+        self.message_ids = dict(message_ids or {})
+        self.errors = dict(errors or {})
+
+    def record(self, room_id, response, error=None):
+        """
+        Records the outcome of sending to a room.
+
+        :param room_id: Id of the room.
+        :param response: Response of the send request.
+        :param error: Exception raised by the send request, if any.
+        """
+        if error is not None:
+            self.errors[room_id] = error
+            return
+
+        self.errors.pop(room_id, None)
+        self.message_ids[room_id] = (
+            response.get("message_id") if isinstance(response, dict) else response
+        )
+
+    def is_complete(self, room_ids):
+        """
+        :param room_ids: Rooms the broadcast targets.
+
+        :return: True if every room has been delivered to.
+        """
+        return all(room_id in self.message_ids for room_id in room_ids)
+
+    def __repr__(self):
+        return "BroadcastResult(sent={}, failed={})".format(
+            len(self.message_ids), len(self.errors)
+        )
@@ -0,0 +1,165 @@
+import inspect
+import threading
+import time
+
+from pusher_chatkit.exceptions import (
+    PusherBadAuth,
+    PusherBadRequest,
+    PusherBulkheadFull,
+    PusherCircuitOpen,
+    PusherDeadlineExceeded,
+    PusherForbidden,
+    PusherNotFound,
+)
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# Errors caused by the request itself, which say nothing about the service's health.
+CLIENT_ERRORS = (PusherBadRequest, PusherBadAuth, PusherForbidden, PusherNotFound)
+
+
+class CircuitBreaker(object):
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30, max_concurrency=None):
+        """
+        Circuit breaker guarding calls to one ChatKit service.
+
+        After `failure_threshold` consecutive failures (server errors, timeouts,
+        connection errors) the circuit opens and calls fail fast with
+        PusherCircuitOpen; callers' own deadlines running out are not counted.
+        Once `recovery_timeout` seconds have passed a single probe call is let
+        through (half-open): its success closes the circuit, its failure opens
+        it again.
+
+        Safe to share between threads.
+
+        :param name: Name of the guarded service.
+        :param failure_threshold: Consecutive failures before opening the circuit.
+        :param recovery_timeout: Seconds to wait before probing an open circuit.
+        :param max_concurrency: Optional maximum number of calls in flight; further
+            calls fail fast with PusherBulkheadFull so a slow service cannot tie
+            up every worker.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.max_concurrency = max_concurrency
+
+        self.state = CLOSED
+        self.failures = 0
+        self.in_flight = 0
+        self._opened_at = None
+        self._probing = False
+        # Incremented when the circuit opens or closes.
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Registers a call, or fails fast if the circuit or the bulkhead is full.
+
+        :return: Ticket to pass to `after_call` once the call completes.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    raise PusherCircuitOpen(
+                        "{} circuit is open after {} failures".format(
+                            self.name, self.failures
+                        )
+                    )
+                self.state = HALF_OPEN
+
+            probe = self.state == HALF_OPEN
+
+            if probe:
+                if self._probing:
+                    raise PusherCircuitOpen("{} circuit is half-open".format(self.name))
+                self._probing = True
+
+            if self.max_concurrency and self.in_flight >= self.max_concurrency:
+                if probe:
+                    self._probing = False
+                raise PusherBulkheadFull(
+                    "{} has {} calls in flight".format(self.name, self.in_flight)
+                )
+
+            self.in_flight += 1
+
+            return self._generation, probe
+
+    def after_call(self, ticket, error=None):
+        """
+        Records the outcome of a call.
+
+        Only the probe decides whether a half-open circuit closes or opens
+        again; calls started before the circuit last changed state are
+        ignored, so a late success cannot close an open circuit.
+
+        :param ticket: Value returned by `before_call`.
+        :param error: Exception raised by the call, if any.
+        """
+        generation, probe = ticket
+
+        with self._lock:
+            self.in_flight -= 1
+
+            if probe:
+                self._probing = False
+            elif generation != self._generation or self.state != CLOSED:
+                return
+
+            # The caller ran out of time: neither a failure nor a success.
+            # A probe timing out leaves the circuit half-open for the next one.
+            if isinstance(error, PusherDeadlineExceeded):
+                return
+
+            if error is None or isinstance(error, CLIENT_ERRORS):
+                if probe:
+                    self._change_state(CLOSED)
+                self.failures = 0
+                return
+
+            self.failures += 1
+
+            if probe or self.failures >= self.failure_threshold:
+                self._change_state(OPEN)
+                self._opened_at = time.monotonic()
+
+    def _change_state(self, state):
+        self.state = state
+        self._generation += 1
+
+    def call(self, func, *args, **kwargs):
+        """
+        Calls `func` through the breaker.
+
+        If `func` returns an awaitable, the outcome is recorded once it completes.
+        """
+        ticket = self.before_call()
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception as exc:
+            self.after_call(ticket, exc)
+            raise
+
+        if inspect.isawaitable(result):
+            return self._await(ticket, result)
+
+        self.after_call(ticket)
+
+        return result
+
+    async def _await(self, ticket, awaitable):
+        try:
+            result = await awaitable
+        except Exception as exc:
+            self.after_call(ticket, exc)
+            raise
+
+        self.after_call(ticket)
+
+        return result
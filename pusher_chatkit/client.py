@@ -1,5 +1,9 @@
 import json
 
+from pusher_chatkit import deadlines
+from pusher_chatkit.circuit_breaker import CircuitBreaker
+from pusher_chatkit.lazy import LazyList
+from pusher_chatkit.lru import LRUCache
 from pusher_chatkit.exceptions import (
     PusherBadAuth,
     PusherBadRequest,
@@ -11,8 +15,11 @@ from urllib.parse import urlencode, quote_plus
 
 
 class PusherChatKitClient(object):
-    def __init__(self, backend, instance_locator):
+    def __init__(
+            self, backend, instance_locator, circuit_breaker=None, validator_cache=None
+    ):
         self.http = backend()
+        self.validator_cache = validator_cache
         self.instance_locator = instance_locator.split(":")
         self.scheme = "https"
         self.host = self.instance_locator[1] + ".pusherplatform.io"
@@ -26,6 +33,10 @@ class PusherChatKitClient(object):
             "cursors": {"service_name": "chatkit_cursors", "service_version": "v2"},
             "chatkit_v4": {"service_name": "chatkit", "service_version": "v4"},
         }
+        self.breakers = {
+            service: CircuitBreaker(service, **(circuit_breaker or {}))
+            for service in self.services
+        }
 
     def build_endpoint(self, service, api_endpoint, query):
         service_path_fragment = (
@@ -44,44 +55,167 @@ class PusherChatKitClient(object):
 
         return full_path + query
 
-    def get(self, service, endpoint, query=None, **kwargs):
-        return self.http.process_request(
-            "GET",
+    def request(self, method, service, endpoint, query=None, **kwargs):
+        options = {}
+
+        if kwargs.get("cache"):
+            options["cache"] = kwargs["cache"]
+
+        if kwargs.get("lazy"):
+            options["lazy"] = True
+
+        # Fails fast once the deadline has passed, else bounds the backend timeout.
+        timeout = deadlines.remaining()
+
+        if timeout is not None:
+            options["timeout"] = timeout
+
+        return self.breakers[service].call(
+            self.http.process_request,
+            method,
             self.build_endpoint(service, endpoint, query),
             kwargs.get("body", None),
             kwargs.get("token", None),
+            **options
         )
 
+    def get(self, service, endpoint, query=None, **kwargs):
+        kwargs.setdefault("cache", self.validator_cache)
+        return self.request("GET", service, endpoint, query, **kwargs)
+
     def put(self, service, endpoint, query=None, **kwargs):
-        return self.http.process_request(
-            "PUT",
-            self.build_endpoint(service, endpoint, query),
-            kwargs.get("body", None),
-            kwargs.get("token", None),
-        )
+        return self.request("PUT", service, endpoint, query, **kwargs)
 
     def post(self, service, endpoint, query=None, **kwargs):
-        return self.http.process_request(
-            "POST",
-            self.build_endpoint(service, endpoint, query),
-            kwargs.get("body", None),
-            kwargs.get("token", None),
-        )
+        return self.request("POST", service, endpoint, query, **kwargs)
 
     def delete(self, service, endpoint, query=None, **kwargs):
-        return self.http.process_request(
-            "DELETE",
-            self.build_endpoint(service, endpoint, query),
-            kwargs.get("body", None),
-            kwargs.get("token", None),
-        )
+        return self.request("DELETE", service, endpoint, query, **kwargs)
+
+    def upload(self, url, upload):
+        options = {}
+        timeout = deadlines.remaining()
+
+        if timeout is not None:
+            options["timeout"] = timeout
+
+        return self.http.process_upload(url, upload, **options)
+
+
+def encode_body(body):
+    """
+    Encode a request body for the wire.
 
+    Bodies that are already encoded (`bytes` or `str`, e.g. from
+    `messages.encode_parts`) are sent as-is; anything else is JSON encoded.
+    Empty bodies are not sent at all.
+    """
+    if not body:
+        return None
 
-def process_response(status, body, error=""):
+    if isinstance(body, (bytes, str)):
+        return body
+
+    return json.dumps(body)
+
+
+class ValidatorCache(object):
+    def __init__(self, max_size=1024):
+        """
+        Caches GET responses along with their ETag / Last-Modified validators.
+
+        Backends revalidate cached responses with If-None-Match /
+        If-Modified-Since; a 304 returns the cached value itself, without
+        downloading or parsing the body again. Cached values are shared
+        between calls and must not be modified.
+
+        Safe to share between threads.
+
+        :param max_size: Maximum number of responses kept, least recently used
+            are dropped.
+        """
+        self._entries = LRUCache(max_size)
+
+    @staticmethod
+    def key(endpoint, token, lazy=False):
+        # Responses may depend on who asks, so the token is part of the key.
+        # Lazy and decoded responses are cached apart.
+        return endpoint, token["token"] if token else None, lazy
+
+    @property
+    def max_size(self):
+        return self._entries.max_size
+
+    def validators(self, endpoint, token, lazy=False):
+        """
+        :return: tuple of (dict of the validator headers to send for the
+            request, cached value they validate or None). Pass the value
+            back to `process_response`.
+        """
+        entry = self._entries.get(self.key(endpoint, token, lazy))
+
+        if entry is None:
+            return {}, None
+
+        etag, last_modified, value = entry
+        headers = {}
+
+        if etag:
+            headers["If-None-Match"] = etag
+
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        return headers, value
+
+    def process_response(
+            self, endpoint, token, status, headers, body, error="", lazy=False,
+            cached=None
+    ):
+        """
+        Like `process_response`, answering 304s from the cache and storing
+        responses that carry validators.
+
+        :param headers: Response headers (case-insensitive mapping).
+        :param cached: Value returned by `validators` for the request. A 304
+            returns it even if it has since been dropped from the cache.
+        """
+        key = self.key(endpoint, token, lazy)
+
+        if status == 304:
+            if cached is None:
+                entry = self._entries.get(key)
+                cached = entry and entry[2]
+
+            if cached is not None:
+                return cached
+
+        value = process_response(status, body, error, lazy)
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+
+        if etag or last_modified:
+            self._entries.set(key, (etag, last_modified, value))
+        else:
+            self._entries.pop(key)
+
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+
+def process_response(status, body, error="", lazy=False):
     if 200 <= status <= 299:
-        return json.loads(body) if body else None
+        if not body:
+            return None
+
+        return LazyList(body) if lazy else json.loads(body)
+
+    if isinstance(body, bytes):
+        body = body.decode("utf8", "replace")
 
-    elif status == 400:
+    if status == 400:
         raise PusherBadRequest(body)
 
     elif status == 401:
@@ -0,0 +1,272 @@
+import asyncio
+import contextvars
+import inspect
+import threading
+import time
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pusher_chatkit import deadlines
+
+
+class RateLimiter(object):
+    def __init__(self, rate, burst=1):
+        """
+        Token bucket limiting how many calls may start per second.
+
+        Safe to share between threads.
+
+        :param rate: Number of calls allowed per second.
+        :param burst: Number of calls allowed back to back before throttling.
+        """
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._interval = 1.0 / self.rate
+        self._next_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Reserves the next slot.
+
+        :return: Number of seconds to wait before using the slot.
+        """
+        with self._lock:
+            now = time.monotonic()
+            next_at = max(self._next_at, now)
+            self._next_at = next_at + self._interval
+
+        return max(0.0, next_at - now - (self.burst - 1) * self._interval)
+
+    def acquire(self):
+        """
+        Blocks until the next slot is available.
+        """
+        delay = self.reserve()
+
+        if delay:
+            time.sleep(delay)
+
+
+def run_concurrently(
+    calls, max_concurrency=10, rate_limiter=None, on_result=None, executor=None
+):
+    """
+    Runs zero-argument callables on a bounded thread pool.
+
+    :param calls: dict of key -> callable.
+    :param max_concurrency: Maximum number of calls in flight.
+    :param rate_limiter: Optional RateLimiter applied before each call.
+    :param on_result: Optional callable(key, result, error) invoked, in the
+        calling thread, as each call completes.
+    :param executor: Optional long-lived ThreadPoolExecutor to run the calls
+        on, so that its threads keep their connections alive between calls.
+        Without it, a pool is created for the calls.
+
+    :return: tuple of (results, errors) dicts, keyed like `calls`.
+    """
+    results = {}
+    errors = {}
+
+    if not calls:
+        return results, errors
+
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            return run_concurrently(calls, max_concurrency, rate_limiter, on_result, pool)
+
+    def run(call):
+        if rate_limiter:
+            rate_limiter.acquire()
+        return call()
+
+    queued = iter(calls.items())
+    futures = {}
+
+    def submit_next():
+        for key, call in queued:
+            # Each call runs in a copy of the caller's context, deadline included.
+            futures[executor.submit(contextvars.copy_context().run, run, call)] = key
+            return
+
+    # The executor may be shared: calls are submitted as others complete, so
+    # no more than `max_concurrency` of them are in flight.
+    for _ in range(max(1, max_concurrency)):
+        submit_next()
+
+    while futures:
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            key = futures.pop(future)
+            error = future.exception()
+
+            if error is None:
+                results[key] = future.result()
+            else:
+                errors[key] = error
+
+            if on_result:
+                on_result(key, results.get(key), error)
+
+            submit_next()
+
+    return results, errors
+
+
+async def run_concurrently_async(
+    calls, max_concurrency=10, rate_limiter=None, on_result=None
+):
+    """
+    Coroutine counterpart of `run_concurrently`.
+
+    Calls may return plain values or awaitables; at most `max_concurrency`
+    of them are awaited at once.
+    """
+    results = {}
+    errors = {}
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(key, call):
+        async with semaphore:
+            if rate_limiter:
+                delay = rate_limiter.reserve()
+
+                if delay:
+                    await asyncio.sleep(delay)
+
+            error = None
+
+            try:
+                result = call()
+
+                if inspect.isawaitable(result):
+                    result = await result
+
+                results[key] = result
+
+            except Exception as exc:
+                error = errors[key] = exc
+
+            if on_result:
+                on_result(key, results.get(key), error)
+
+    await asyncio.gather(*(run(key, call) for key, call in calls.items()))
+
+    return results, errors
+
+
+#
+# STEPS
+#
+# Helpers that need several requests are written once, as generators that
+# yield each request's result (or a Parallel batch) and receive its value
+# back. `run_steps` drives them with a blocking backend, `run_steps_async`
+# awaits each step, so sync and async clients share the same logic.
+#
+
+
+class Parallel(object):
+    def __init__(self, calls, max_concurrency=10, rate_limiter=None, on_result=None):
+        """
+        Step asking the driver to run several calls concurrently.
+
+        The step's value is the (results, errors) tuple of `run_concurrently`.
+        """
+        self.calls = calls
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter
+        self.on_result = on_result
+
+    def run(self, executor=None):
+        return run_concurrently(
+            self.calls, self.max_concurrency, self.rate_limiter, self.on_result, executor
+        )
+
+    def run_async(self):
+        return run_concurrently_async(
+            self.calls, self.max_concurrency, self.rate_limiter, self.on_result
+        )
+
+
+def run_steps(steps, deadline=None, executor=None):
+    """
+    Drives a steps generator whose requests complete synchronously.
+
+    :param deadline: Overall budget in seconds shared by all the steps.
+    :param executor: Optional ThreadPoolExecutor running the Parallel steps.
+
+    :return: The generator's return value.
+    """
+    with deadlines.deadline(deadline):
+        return _run_steps(steps, executor)
+
+
+def _run_steps(steps, executor=None):
+    value = None
+
+    while True:
+        try:
+            step = steps.send(value)
+        except StopIteration as stop:
+            return stop.value
+
+        value = step.run(executor) if isinstance(step, Parallel) else step
+
+
+async def run_steps_async(steps, deadline=None, executor=None):
+    """
+    Drives a steps generator, awaiting each step.
+
+    Parallel steps run on the event loop: `executor` is only accepted for
+    symmetry with `run_steps`.
+
+    Exceptions raised while awaiting a step are thrown back into the
+    generator, where the helper can handle them as in the sync case.
+
+    :param deadline: Overall budget in seconds shared by all the steps.
+
+    :return: The generator's return value.
+    """
+    with deadlines.deadline(deadline):
+        return await _run_steps_async(steps)
+
+
+async def _run_steps_async(steps):
+    value = None
+    error = None
+
+    while True:
+        try:
+            step = steps.throw(error) if error is not None else steps.send(value)
+        except StopIteration as stop:
+            return stop.value
+
+        value = None
+        error = None
+
+        try:
+            if isinstance(step, Parallel):
+                value = await step.run_async()
+
+            elif inspect.isawaitable(step):
+                value = await step
+
+            else:
+                value = step
+
+        except Exception as exc:
+            error = exc
+
+
+def gather_steps(calls, max_concurrency=10):
+    """
+    Step helper running calls concurrently, for use with `yield from`.
+
+    :return: dict of results keyed like `calls`. Raises the first error, if any.
+    """
+    results, errors = yield Parallel(calls, max_concurrency=max_concurrency)
+
+    if errors:
+        raise next(iter(errors.values()))
+
+    return results
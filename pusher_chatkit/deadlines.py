@@ -0,0 +1,75 @@
+import contextvars
+import time
+
+from contextlib import contextmanager
+
+from pusher_chatkit.exceptions import PusherDeadlineExceeded
+
+
+_deadline = contextvars.ContextVar("pusher_chatkit_deadline", default=None)
+
+
+@contextmanager
+def until(at):
+    """
+    Bounds the requests made inside the block to an absolute deadline.
+
+    Nested deadlines can only shorten the current one.
+
+    :param at: Deadline as a `time.monotonic()` value, or None for no deadline.
+    """
+    current = _deadline.get()
+
+    if at is None or (current is not None and current <= at):
+        yield current
+        return
+
+    token = _deadline.set(at)
+
+    try:
+        yield at
+    finally:
+        _deadline.reset(token)
+
+
+def deadline(seconds):
+    """
+    Bounds the requests made inside the block to `seconds` overall:
+
+        with deadline(0.2):
+            chatkit.get_user(user_id)
+
+    :param seconds: Budget in seconds, or None for no deadline.
+    """
+    return until(None if seconds is None else time.monotonic() + seconds)
+
+
+def deadline_at(seconds):
+    """
+    :return: Absolute deadline `seconds` from now, capped by the current one.
+    """
+    at = None if seconds is None else time.monotonic() + seconds
+    current = _deadline.get()
+
+    if current is not None and (at is None or current < at):
+        return current
+
+    return at
+
+
+def remaining():
+    """
+    :return: Seconds left before the current deadline, or None without one.
+        Raises PusherDeadlineExceeded once it has passed.
+    """
+    at = _deadline.get()
+
+    if at is None:
+        return None
+
+    left = at - time.monotonic()
+
+    if left <= 0:
+        raise PusherDeadlineExceeded("Deadline exceeded by {:.3f}s".format(-left))
+
+    return left
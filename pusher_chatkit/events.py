@@ -0,0 +1,46 @@
+import functools
+import inspect
+
+
+def notifies(method):
+    """
+    Decorates a PusherChatKit method so its listeners are told about each
+    successful call, once the request has completed.
+
+    Listeners are called as listener(event, arguments, result), `event` being
+    the method name and `arguments` a dict of the call's arguments.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+
+        if not self.listeners:
+            return result
+
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        del arguments["self"]
+
+        if inspect.isawaitable(result):
+            return _notify_async(self.listeners, method.__name__, arguments, result)
+
+        _notify(self.listeners, method.__name__, arguments, result)
+
+        return result
+
+    return wrapper
+
+
+def _notify(listeners, event, arguments, result):
+    for listener in list(listeners):
+        listener(event, arguments, result)
+
+
+async def _notify_async(listeners, event, arguments, awaitable):
+    result = await awaitable
+    _notify(listeners, event, arguments, result)
+
+    return result
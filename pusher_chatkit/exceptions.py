@@ -16,3 +16,19 @@ class PusherNotFound(Exception):
 
 class PusherBadStatus(Exception):
     pass
+
+
+class PusherCircuitOpen(Exception):
+    pass
+
+
+class PusherBulkheadFull(Exception):
+    pass
+
+
+class PusherDeadlineExceeded(Exception):
+    pass
+
+
+class PusherPaginationError(Exception):
+    pass
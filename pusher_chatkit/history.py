@@ -0,0 +1,44 @@
+import time
+
+from pusher_chatkit.lru import LRUCache
+
+
+class HistoryCache(object):
+    def __init__(self, ttl=5, max_size=1024):
+        """
+        Short-lived cache of room messages, for `get_messages_for_rooms`.
+
+        Entries are keyed by room and newest message id, when the caller
+        knows it: a new message changes the key, so the cache never hides it,
+        and the TTL only bounds how long edits and deletions may go unseen.
+        Without the newest message id, entries are plain TTL entries.
+        Cached messages are shared between calls and must not be modified.
+
+        Safe to share between threads.
+
+        :param ttl: Seconds an entry is used for.
+        :param max_size: Maximum number of entries kept, least recently used
+            are dropped.
+        """
+        self.ttl = ttl
+        self._entries = LRUCache(max_size)
+
+    @staticmethod
+    def key(room_id, newest_id, limit, direction):
+        return room_id, newest_id, limit, direction
+
+    @property
+    def max_size(self):
+        return self._entries.max_size
+
+    def get(self, key):
+        """
+        :return: The cached messages, None if missing or expired.
+        """
+        return self._entries.get(key)
+
+    def set(self, key, messages):
+        self._entries.set(key, messages, time.monotonic() + self.ttl)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,308 @@
+import codecs
+import json
+import threading
+
+from collections.abc import Sequence
+
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# Characters that may continue a number cut off at the end of a chunk.
+_NUMBER_CONTINUATION = "0123456789.eE+-"
+
+
+def _skip_whitespace(text, pos):
+    while pos < len(text) and text[pos] in _WHITESPACE:
+        pos += 1
+
+    return pos
+
+
+class LazyList(Sequence):
+    def __init__(self, raw):
+        """
+        Read-only list over the raw body of a JSON array response, decoding
+        items only when they are accessed.
+
+        The body is decoded to text on first access. Items are then decoded
+        one at a time, up to the last one accessed: reading the first few
+        items of a large page costs a fraction of `json.loads`. Only the
+        offsets of the items and the items actually accessed are kept, so
+        `ids`, `fields` and `len`, which decode every item, hold a fraction
+        of the memory `json.loads` would, but take somewhat longer.
+        Accessed items are shared between calls and must not be modified.
+
+        Safe to share between threads.
+
+        :param raw: Body of the response (bytes or str).
+        """
+        self._raw = raw
+        self._text = None
+        self._offsets = []
+        self._scanned = None  # Where to look for the next item, None once done.
+        self._items = {}
+        self._lock = threading.Lock()
+
+    @property
+    def raw(self):
+        """
+        :return: The response body, as bytes.
+        """
+        if self._raw is None:
+            return self._text.encode("utf8")
+
+        return self._raw if isinstance(self._raw, bytes) else self._raw.encode("utf8")
+
+    def _start(self):
+        # The bytes are dropped once decoded to text.
+        raw, self._raw = self._raw, None
+        self._text = raw.decode("utf8") if isinstance(raw, bytes) else raw
+
+        pos = _skip_whitespace(self._text, 0)
+
+        if not self._text.startswith("[", pos):
+            raise ValueError("Expected a JSON array at position {}".format(pos))
+
+        pos = _skip_whitespace(self._text, pos + 1)
+        self._scanned = None if self._text.startswith("]", pos) else pos
+
+    def _next(self, end):
+        """
+        :return: Offset of the item following the one ending at `end`, None
+            at the end of the array.
+        """
+        text = self._text
+
+        # In compact bodies the separator directly follows the item.
+        if not text.startswith(",", end):
+            end = _skip_whitespace(text, end)
+
+            if text.startswith("]", end):
+                return None
+
+            if not text.startswith(",", end):
+                raise ValueError("Expected ',' or ']' at position {}".format(end))
+
+        return _skip_whitespace(text, end + 1)
+
+    def _scan(self):
+        """
+        Decodes the next unscanned item and records its offset.
+
+        :return: tuple of (index, item), None at the end of the array.
+        """
+        if self._text is None:
+            self._start()
+
+        if self._scanned is None:
+            return None
+
+        item, end = _decoder.raw_decode(self._text, self._scanned)
+        self._offsets.append(self._scanned)
+        self._scanned = self._next(end)
+
+        return len(self._offsets) - 1, item
+
+    def _decode(self, index):
+        with self._lock:
+            if index < len(self._offsets):
+                offset = self._offsets[index]
+            else:
+                # Finding an item decodes it: return it rather than decoding
+                # it again.
+                while True:
+                    scanned = self._scan()
+
+                    if scanned is None:
+                        raise IndexError("LazyList index out of range")
+
+                    if scanned[0] == index:
+                        return scanned[1]
+
+        return _decoder.raw_decode(self._text, offset)[0]
+
+    def _iter_decoded(self):
+        """
+        Iterates over every item, decoding them again without keeping them.
+        """
+        index = 0
+
+        while True:
+            with self._lock:
+                if index < len(self._offsets):
+                    scanned = None
+                    offset = self._offsets[index]
+                else:
+                    scanned = self._scan()
+
+                    if scanned is None:
+                        return
+
+            if scanned is not None:
+                yield scanned[1]
+            else:
+                yield _decoder.raw_decode(self._text, offset)[0]
+
+            index += 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.start or 0, index.stop, index.step or 1
+
+            # Forward slices with a known end decode no further than needed.
+            if start < 0 or stop is None or stop < 0 or step < 0:
+                return [self[i] for i in range(*index.indices(len(self)))]
+
+            items = []
+
+            for i in range(start, stop, step):
+                try:
+                    items.append(self[i])
+                except IndexError:
+                    break
+
+            return items
+
+        if index < 0:
+            index += len(self)
+
+            if index < 0:
+                raise IndexError("LazyList index out of range")
+
+        try:
+            return self._items[index]
+        except KeyError:
+            return self._items.setdefault(index, self._decode(index))
+
+    def __iter__(self):
+        for index, item in enumerate(self._iter_decoded()):
+            yield self._items.setdefault(index, item)
+
+    def __len__(self):
+        with self._lock:
+            if self._text is None:
+                self._start()
+
+            while self._scanned is not None:
+                self._scan()
+
+            return len(self._offsets)
+
+    def __eq__(self, other):
+        if isinstance(other, (LazyList, list, tuple)):
+            return list(self) == list(other)
+
+        return NotImplemented
+
+    def __repr__(self):
+        return "LazyList({} bytes)".format(len(self.raw))
+
+    def ids(self, key="id"):
+        """
+        Projects every item to its id, without keeping the items.
+
+        :param key: Name of the id field.
+
+        :return: list of ids.
+        """
+        return [item[key] for item in self._iter_decoded()]
+
+    def fields(self, *names):
+        """
+        Projects every item to the given fields, without keeping the items.
+        Fields missing from an item are left out.
+
+        :param names: Names of the fields to keep.
+
+        :return: list of dicts.
+        """
+        return [
+            {name: item[name] for name in names if name in item}
+            for item in self._iter_decoded()
+        ]
+
+
+def iter_array(chunks, encoding="utf8"):
+    """
+    Iterates over the items of a JSON array read in chunks, holding no more
+    than a chunk and the item being decoded in memory.
+
+    Meant for large arrays read from files, such as exports: API responses
+    are not streamed, use `lazy=True` for those.
+
+    :param chunks: Iterable of bytes or str.
+    :param encoding: Encoding of bytes chunks.
+
+    :return: Iterator over the decoded items.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    chunks = iter(chunks)
+    text = ""
+    pos = 0
+    eof = False
+    started = False
+    expect_comma = False
+
+    def read(text, pos):
+        # Consumed text is only dropped when reading more, to avoid copying
+        # the buffer after every item.
+        chunk = next(chunks, None)
+
+        if chunk is None:
+            return text[pos:] + decoder.decode(b"", final=True), True
+
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+
+        return text[pos:] + chunk, False
+
+    while True:
+        pos = _skip_whitespace(text, pos)
+
+        if pos == len(text):
+            if eof:
+                raise ValueError("Unterminated JSON array")
+
+            text, eof = read(text, pos)
+            pos = 0
+            continue
+
+        if not started:
+            if text[pos] != "[":
+                raise ValueError("Expected a JSON array")
+
+            started = True
+            pos += 1
+            continue
+
+        if text[pos] == "]":
+            return
+
+        if expect_comma:
+            if text[pos] != ",":
+                raise ValueError("Expected ',' or ']'")
+
+            expect_comma = False
+            pos += 1
+            continue
+
+        try:
+            item, end = _decoder.raw_decode(text, pos)
+        except ValueError:
+            if eof:
+                raise
+
+            text, eof = read(text, pos)
+            pos = 0
+            continue
+
+        # A number at the end of the buffer may continue in the next chunk,
+        # e.g. "1." then "5".
+        if not eof and (end == len(text) or text[end] in _NUMBER_CONTINUATION):
+            text, eof = read(text, pos)
+            pos = 0
+            continue
+
+        yield item
+        pos = end
+        expect_comma = True
@@ -0,0 +1,370 @@
+"""
+Load generator for ChatKit workloads.
+
+Drives a weighted mix of PusherChatKit operations at a target rate and/or
+concurrency, and reports throughput and latency percentiles per interval:
+
+    python -m pusher_chatkit.loadgen --base-url http://127.0.0.1:8080 \\
+        --mix send=5,paginate=3,cursor=2,role_check=1 --rate 500 --duration 60
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+
+from functools import partial
+from urllib.parse import urlsplit
+
+from pusher_chatkit.async_pusher_chatkit import AsyncPusherChatKit
+from pusher_chatkit.backends import ReplayBackend, RequestsBackend, TornadoBackend
+from pusher_chatkit.concurrency import RateLimiter
+from pusher_chatkit.messages import TextMessage
+from pusher_chatkit.pusher_chatkit import PusherChatKit
+
+
+#
+# OPERATIONS
+#
+# Each operation takes the chatkit, a random generator and the workload
+# settings, and returns the result of its call (an awaitable for async clients).
+#
+
+
+def _user(rng, args):
+    return "user-{}".format(rng.randrange(args.users))
+
+
+def _room(rng, args):
+    return "room-{}".format(rng.randrange(args.rooms))
+
+
+OPERATIONS = {
+    "send": lambda chatkit, rng, args: chatkit.send_message(
+        _user(rng, args), _room(rng, args), "load test message"
+    ),
+    "multipart": lambda chatkit, rng, args: chatkit.send_multipart_message(
+        _user(rng, args), _room(rng, args), [TextMessage("load test message")]
+    ),
+    "paginate": lambda chatkit, rng, args: chatkit.get_room_messages(
+        _room(rng, args), limit=args.page_size
+    ),
+    "cursor": lambda chatkit, rng, args: chatkit.set_user_read_cursors(
+        _user(rng, args), _room(rng, args), rng.randrange(1, 1000000)
+    ),
+    "role_check": lambda chatkit, rng, args: chatkit.list_user_roles(_user(rng, args)),
+    "get_user": lambda chatkit, rng, args: chatkit.get_user(_user(rng, args)),
+    "get_users": lambda chatkit, rng, args: chatkit.get_users(limit=args.page_size),
+}
+
+
+def parse_mix(mix):
+    """
+    :param mix: Comma separated operation=weight pairs, e.g. 'send=5,paginate=2'.
+
+    :return: tuple of (operation names, weights).
+    """
+    names = []
+    weights = []
+
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+
+        if name not in OPERATIONS:
+            raise ValueError(
+                "Unknown operation {!r}, expected one of: {}".format(
+                    name, ", ".join(sorted(OPERATIONS))
+                )
+            )
+
+        names.append(name)
+        weights.append(float(weight or 1))
+
+    return names, weights
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of already sorted values.
+    """
+    if not values:
+        return None
+
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))
+
+    return values[index]
+
+
+class Stats(object):
+    def __init__(self):
+        """
+        Latencies and errors per operation, for the current interval and overall.
+        """
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._interval = {}
+        self._interval_started_at = self.started_at
+        self._total = {}
+
+    def record(self, name, latency, error=None):
+        with self._lock:
+            for table in (self._interval, self._total):
+                latencies, errors = table.setdefault(name, ([], [0]))
+                latencies.append(latency)
+
+                if error is not None:
+                    errors[0] += 1
+
+    @staticmethod
+    def _summarize(table, elapsed):
+        operations = {}
+        total = 0
+        errors = 0
+
+        for name, (latencies, error_count) in sorted(table.items()):
+            latencies = sorted(latencies)
+            total += len(latencies)
+            errors += error_count[0]
+            operations[name] = {
+                "count": len(latencies),
+                "errors": error_count[0],
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p90_ms": percentile(latencies, 0.90) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "max_ms": latencies[-1] * 1000,
+            }
+
+        return {
+            "elapsed": round(elapsed, 3),
+            "count": total,
+            "errors": errors,
+            "throughput": total / elapsed if elapsed else 0.0,
+            "operations": operations,
+        }
+
+    def flush_interval(self):
+        now = time.monotonic()
+
+        with self._lock:
+            table = self._interval
+            self._interval = {}
+            elapsed = now - self._interval_started_at
+            self._interval_started_at = now
+
+        summary = self._summarize(table, elapsed)
+        summary["at"] = round(now - self.started_at, 3)
+
+        return summary
+
+    def summary(self):
+        with self._lock:
+            return self._summarize(self._total, time.monotonic() - self.started_at)
+
+
+def format_summary(summary, label):
+    lines = [
+        "{} {:>8.1f} ops/s  {} ops  {} errors".format(
+            label, summary["throughput"], summary["count"], summary["errors"]
+        )
+    ]
+
+    for name, stats in summary["operations"].items():
+        lines.append(
+            "    {:<12} n={:<7} err={:<5} p50={:.1f}ms p90={:.1f}ms "
+            "p99={:.1f}ms max={:.1f}ms".format(
+                name,
+                stats["count"],
+                stats["errors"],
+                stats["p50_ms"],
+                stats["p90_ms"],
+                stats["p99_ms"],
+                stats["max_ms"],
+            )
+        )
+
+    return "\n".join(lines)
+
+
+def build_chatkit(args):
+    asynchronous = args.backend == "tornado"
+
+    if args.backend == "replay":
+        backend = partial(ReplayBackend, args.replay_file, args.replay_latency)
+    elif asynchronous:
+        backend = partial(TornadoBackend, max_clients=args.concurrency)
+    else:
+        backend = RequestsBackend
+
+    chatkit_class = AsyncPusherChatKit if asynchronous else PusherChatKit
+    chatkit = chatkit_class(args.instance_locator, args.api_key, backend)
+
+    if args.base_url:
+        url = urlsplit(args.base_url)
+        chatkit.client.scheme = url.scheme
+        chatkit.client.host = url.netloc
+
+    return chatkit
+
+
+def run_threads(chatkit, names, weights, args, stats, deadline):
+    limiter = RateLimiter(args.rate, burst=args.concurrency) if args.rate else None
+
+    def worker(seed):
+        rng = random.Random(seed)
+
+        while time.monotonic() < deadline:
+            if limiter:
+                limiter.acquire()
+
+            name = rng.choices(names, weights)[0]
+            started = time.monotonic()
+            error = None
+
+            try:
+                OPERATIONS[name](chatkit, rng, args)
+            except Exception as exc:
+                error = exc
+
+            stats.record(name, time.monotonic() - started, error)
+
+    threads = [
+        threading.Thread(target=worker, args=(args.seed + i,), daemon=True)
+        for i in range(args.concurrency)
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    return threads
+
+
+async def run_tasks(chatkit, names, weights, args, stats, deadline):
+    limiter = RateLimiter(args.rate, burst=args.concurrency) if args.rate else None
+
+    async def worker(seed):
+        rng = random.Random(seed)
+
+        while time.monotonic() < deadline:
+            if limiter:
+                delay = limiter.reserve()
+
+                if delay:
+                    await asyncio.sleep(delay)
+
+            name = rng.choices(names, weights)[0]
+            started = time.monotonic()
+            error = None
+
+            try:
+                await OPERATIONS[name](chatkit, rng, args)
+            except Exception as exc:
+                error = exc
+
+            stats.record(name, time.monotonic() - started, error)
+
+    async def report():
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(args.interval, max(0, deadline - time.monotonic())))
+            args.emit(stats.flush_interval())
+
+    await asyncio.gather(
+        report(), *(worker(args.seed + i) for i in range(args.concurrency))
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pusher_chatkit.loadgen",
+        description="Generate load against a ChatKit instance or stand-in server.",
+    )
+    parser.add_argument("--instance-locator", default="v1:local:loadgen")
+    parser.add_argument("--api-key", default="loadgen:secret")
+    parser.add_argument(
+        "--base-url", help="Send requests here instead, e.g. http://127.0.0.1:8080"
+    )
+    parser.add_argument(
+        "--backend", choices=("requests", "tornado", "replay"), default="requests"
+    )
+    parser.add_argument("--replay-file", help="Recording used by the replay backend.")
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        help="Multiplier of the recorded latencies (replay backend).",
+    )
+    parser.add_argument(
+        "--mix",
+        default="send=5,paginate=3,cursor=2,role_check=1",
+        help="Operations and weights: " + ", ".join(sorted(OPERATIONS)),
+    )
+    parser.add_argument(
+        "--rate", type=float, help="Target operations per second (default: unbounded)."
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=16, help="Operations in flight."
+    )
+    parser.add_argument("--duration", type=float, default=30, help="Seconds.")
+    parser.add_argument("--interval", type=float, default=5, help="Report every N seconds.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--json", metavar="PATH", help="Write the intervals and summary as JSON ('-' for stdout)."
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.backend == "replay" and not args.replay_file:
+        parser.error("--replay-file is required with --backend replay")
+
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names, weights = parse_mix(args.mix)
+    chatkit = build_chatkit(args)
+    stats = Stats()
+    intervals = []
+    text_output = sys.stderr if args.json == "-" else sys.stdout
+
+    def emit(summary):
+        intervals.append(summary)
+        print(format_summary(summary, "[{:>7.1f}s]".format(summary["at"])), file=text_output)
+
+    args.emit = emit
+    deadline = time.monotonic() + args.duration
+
+    if args.backend == "tornado":
+        asyncio.run(run_tasks(chatkit, names, weights, args, stats, deadline))
+    else:
+        threads = run_threads(chatkit, names, weights, args, stats, deadline)
+
+        while time.monotonic() < deadline:
+            time.sleep(min(args.interval, max(0, deadline - time.monotonic())))
+            emit(stats.flush_interval())
+
+        for thread in threads:
+            thread.join()
+
+    summary = stats.summary()
+    print(format_summary(summary, "[  total ]"), file=text_output)
+
+    if args.json:
+        report = {"intervals": intervals, "summary": summary, "mix": args.mix}
+
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=2)
+        else:
+            with open(args.json, "w") as fd:
+                json.dump(report, fd, indent=2)
+
+    return 0 if summary["count"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
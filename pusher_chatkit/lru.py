@@ -0,0 +1,63 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    def __init__(self, max_size=1024):
+        """
+        Bounded mapping dropping its least recently used entries, each with
+        an optional expiry time.
+
+        Safe to share between threads.
+
+        :param max_size: Maximum number of entries kept.
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        :return: The value of the entry, `default` if missing or expired.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return default
+
+            if entry[1] is not None and entry[1] <= now:
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+
+            return entry[0]
+
+    def set(self, key, value, expires_at=None):
+        """
+        :param expires_at: Optional `time.monotonic()` time at which the entry expires.
+        """
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,222 @@
+import threading
+
+from array import array
+from bisect import bisect_left
+from functools import partial
+
+from pusher_chatkit.concurrency import gather_steps
+from pusher_chatkit.exceptions import PusherNotFound
+
+
+class Interner(object):
+    def __init__(self):
+        """
+        Maps string ids to small integers, and back.
+
+        Ids are never released, so an index can keep storing plain ints.
+        """
+        self.numbers = {}
+        self.values = []
+
+    def intern(self, value):
+        number = self.numbers.get(value)
+
+        if number is None:
+            number = self.numbers[value] = len(self.values)
+            self.values.append(value)
+
+        return number
+
+    def get(self, value):
+        return self.numbers.get(value)
+
+
+class MembershipIndex(object):
+    def __init__(self, chatkit=None, max_concurrency=10):
+        """
+        In-memory, bidirectional index of room memberships.
+
+        Room and user ids are interned to integers, and each direction is a
+        dict of int -> sorted array of 32-bit ints, about a third of the
+        memory of sets, so millions of memberships fit in a few hundred MB.
+        Lookups and updates bisect the arrays. The index is loaded with `load` and,
+        when given a chatkit, kept current by listening to room changes made
+        through it.
+
+        :param chatkit: PusherChatKit or AsyncPusherChatKit.
+        :param max_concurrency: Maximum number of requests in flight while loading.
+        """
+        self.chatkit = chatkit
+        self.max_concurrency = max_concurrency
+
+        self._rooms = Interner()
+        self._users = Interner()
+        self._room_members = {}
+        self._user_rooms = {}
+        self._lock = threading.Lock()
+
+        if chatkit is not None:
+            chatkit.add_listener(self._on_event)
+
+    def __len__(self):
+        return sum(len(members) for members in self._room_members.values())
+
+    def members(self, room_id):
+        """
+        :return: Set of the ids of the users in the room.
+        """
+        room = self._rooms.get(room_id)
+        users = self._users.values
+
+        with self._lock:
+            return {users[user] for user in self._room_members.get(room, ())}
+
+    def rooms_of(self, user_id):
+        """
+        :return: Set of the ids of the rooms the user is in.
+        """
+        user = self._users.get(user_id)
+        rooms = self._rooms.values
+
+        with self._lock:
+            return {rooms[room] for room in self._user_rooms.get(user, ())}
+
+    def is_member(self, user_id, room_id):
+        room = self._rooms.get(room_id)
+        user = self._users.get(user_id)
+
+        if room is None or user is None:
+            return False
+
+        with self._lock:
+            return _contains(self._room_members.get(room, ()), user)
+
+    def add(self, room_id, user_ids):
+        with self._lock:
+            room = self._rooms.intern(room_id)
+            members = self._room_members.setdefault(room, array("I"))
+
+            for user_id in user_ids:
+                user = self._users.intern(user_id)
+
+                if _insert(members, user):
+                    _insert(self._user_rooms.setdefault(user, array("I")), room)
+
+    def remove(self, room_id, user_ids):
+        room = self._rooms.get(room_id)
+
+        if room is None:
+            return
+
+        with self._lock:
+            members = self._room_members.get(room, array("I"))
+
+            for user_id in user_ids:
+                user = self._users.get(user_id)
+                _discard(members, user)
+                _discard(self._user_rooms.get(user, array("I")), room)
+
+    def drop_room(self, room_id):
+        room = self._rooms.get(room_id)
+
+        with self._lock:
+            for user in self._room_members.pop(room, ()):
+                _discard(self._user_rooms.get(user, array("I")), room)
+
+    def load(self, user_ids=()):
+        """
+        Loads the memberships of every room listed by `get_rooms` (including
+        private ones) then the rooms of the given users, concurrently.
+
+        :param user_ids: Users whose rooms are loaded with `get_user_rooms`.
+        """
+        return self.chatkit._run(self._load_steps(user_ids))
+
+    def _load_steps(self, user_ids):
+        from_id = 0
+
+        while True:
+            try:
+                rooms = yield self.chatkit.get_rooms(
+                    from_id=from_id, include_private=True
+                )
+            except PusherNotFound:
+                break
+
+            rooms = [room for room in rooms or [] if room["id"] != from_id]
+
+            if not rooms:
+                break
+
+            for room in rooms:
+                self._add_room(room)
+
+            from_id = rooms[-1]["id"]
+
+        fetched = yield from gather_steps(
+            {
+                user_id: partial(self.chatkit.get_user_rooms, user_id)
+                for user_id in user_ids
+            },
+            self.max_concurrency,
+        )
+
+        for user_id, rooms in fetched.items():
+            # The rooms' members were listed by get_rooms already, only the
+            # user's own memberships are added.
+            for room in rooms or []:
+                self.add(room["id"], [user_id])
+
+        return self
+
+    def _add_room(self, room):
+        self.add(room["id"], room.get("member_user_ids") or [])
+
+    def _on_event(self, event, arguments, result):
+        if event == "create_room" and isinstance(result, dict) and "id" in result:
+            members = set(arguments["user_ids"] or []) | {arguments["creator_id"]}
+            self.add(result["id"], result.get("member_user_ids") or members)
+
+        elif event == "add_users_to_room":
+            self.add(arguments["room_id"], arguments["list_of_ids"])
+
+        elif event == "remove_users_to_room":
+            self.remove(arguments["room_id"], arguments["list_of_ids"])
+
+        elif event == "delete_room":
+            self.drop_room(arguments["room_id"])
+
+
+#
+# SORTED ARRAYS
+#
+
+
+def _contains(numbers, number):
+    index = bisect_left(numbers, number)
+
+    return index < len(numbers) and numbers[index] == number
+
+
+def _insert(numbers, number):
+    """
+    :return: True if `number` was inserted, False if it was already there.
+    """
+    index = bisect_left(numbers, number)
+
+    if index < len(numbers) and numbers[index] == number:
+        return False
+
+    numbers.insert(index, number)
+
+    return True
+
+
+def _discard(numbers, number):
+    if number is None:
+        return
+
+    index = bisect_left(numbers, number)
+
+    if index < len(numbers) and numbers[index] == number:
+        del numbers[index]
@@ -1,7 +1,8 @@
+import json
 from enum import Enum
 from dataclasses import dataclass, field, InitVar, make_dataclass
-from typing import Union
-from functools import partial
+from typing import Iterable, Union
+from functools import lru_cache, partial
 
 
 # region ENUMS
@@ -18,46 +19,173 @@ class MessageType(str, Enum):
 # endregion
 
 
+class _Frozen:
+    """
+    Base for the immutable message classes.
+
+    Attributes are set once through `object.__setattr__` in `__init__`;
+    any later assignment raises, so instances can safely be shared between
+    sends and used as cache keys.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError("{} is immutable".format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError("{} is immutable".format(type(self).__name__))
+
+
+class _FrozenDict(dict):
+    """
+    Read-only dict, still encoded by `json` like any dict.
+    """
+
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("{} is immutable".format(type(self).__name__))
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+def _freeze(value):
+    """
+    :return: Read-only deep copy of a JSON value: dicts become _FrozenDict
+        and lists tuples.
+    """
+    if isinstance(value, dict):
+        return _FrozenDict((key, _freeze(item)) for key, item in value.items())
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+
+    return value
+
+
 # region Payloads
-class Payload:
+class Payload(_Frozen):
+    __slots__ = ("body",)
     key: PayloadKey
     body: Union[str, dict]
 
     def __init__(self, body):
-        self.body = body
+        # A frozen copy: the caller's dict may change, the encoding may not.
+        object.__setattr__(self, "body", _freeze(body))
 
     def as_dict(self) -> dict:
         return {self.key.value: self.body}
 
 
 class InlinePayload(Payload):
+    __slots__ = ()
     key = PayloadKey.CONTENT
 
 
 class AttachmentPayload(Payload):
+    __slots__ = ()
     key = PayloadKey.ATTACHMENT
 
 
 class UrlPayload(Payload):
+    __slots__ = ()
     key = PayloadKey.URL
 
 
 # endregion
 
 
-class MessagePart:
+class MessagePart(_Frozen):
+    __slots__ = ("payload", "_json")
     type: MessageType
-    payload: Payload
+    payload_class = Payload
 
     def __init__(self, payload):
-        self.payload = self.payload(payload)
+        object.__setattr__(self, "payload", self.payload_class(payload))
+        object.__setattr__(self, "_json", None)
+
+    @property
+    def content_type(self) -> str:
+        return getattr(self.type, "value", self.type)
 
     def as_dict(self) -> dict:
-        result = {"type": self.type.value}
+        result = {"type": self.content_type}
         result.update(self.payload.as_dict())
         return result
 
+    def as_json(self) -> bytes:
+        """
+        JSON encoding of this part, computed once and reused afterwards.
+        """
+        if self._json is None:
+            encoded = json.dumps(self.as_dict(), separators=(",", ":"))
+            object.__setattr__(self, "_json", encoded.encode("utf8"))
+        return self._json
+
+    def __eq__(self, other):
+        if not isinstance(other, MessagePart):
+            return NotImplemented
+        return type(self) is type(other) and self.as_json() == other.as_json()
+
+    def __hash__(self):
+        return hash(self.as_json())
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, self.payload.body)
+
 
 class TextMessage(MessagePart):
+    __slots__ = ()
     type: MessageType = MessageType.TEXT
-    payload = InlinePayload
+    payload_class = InlinePayload
+
+
+class UrlMessage(MessagePart):
+    """
+    Part linking to a resource by URL, e.g. UrlMessage(url, "image/png").
+    """
+
+    __slots__ = ("type",)
+    payload_class = UrlPayload
+
+    def __init__(self, url, content_type):
+        object.__setattr__(self, "type", content_type)
+        super().__init__(url)
+
+
+class AttachmentMessage(MessagePart):
+    """
+    Part referencing an attachment previously uploaded to ChatKit,
+    usually obtained from `PusherChatKit.upload_attachment`.
+    """
+
+    __slots__ = ("type",)
+    payload_class = AttachmentPayload
+
+    def __init__(self, attachment_id, content_type):
+        object.__setattr__(self, "type", content_type)
+        super().__init__({"id": attachment_id})
+
+
+def encode_parts(parts: Iterable[MessagePart]) -> bytes:
+    """
+    Encode a list of parts into the body of a v4 multipart message.
+
+    Bodies are cached by their parts, so sending the same parts to many
+    rooms only serializes them once.
+
+    :param parts: Message parts, in order.
+
+    :return: JSON body (bytes)
+    """
+    return _encode_parts(tuple(parts))
+
+
+@lru_cache(maxsize=256)
+def _encode_parts(parts) -> bytes:
+    return b'{"parts":[' + b",".join(part.as_json() for part in parts) + b"]}"
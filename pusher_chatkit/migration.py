@@ -0,0 +1,343 @@
+import csv
+import json
+import os
+import time
+import zlib
+
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    BrokenExecutor,
+    ProcessPoolExecutor,
+    wait,
+)
+from functools import partial
+
+from pusher_chatkit.backends import RequestsBackend
+from pusher_chatkit.concurrency import run_concurrently
+from pusher_chatkit.pusher_chatkit import PusherChatKit
+
+
+# Methods called once per chunk with the list of records, instead of once per record.
+BATCH_METHODS = ("batch_create_user",)
+
+# Number of chunk lanes per process when records are ordered by a key.
+LANES_PER_PROCESS = 4
+
+
+def read_records(path, format=None):
+    """
+    Streams records from a CSV (with a header row) or NDJSON file.
+
+    :param path: Path of the file.
+    :param format: 'csv' or 'ndjson'. Guessed from the extension if omitted.
+
+    :return: Iterator over the records (dict).
+    """
+    format = format or ("csv" if path.lower().endswith(".csv") else "ndjson")
+
+    with open(path, newline="" if format == "csv" else None, encoding="utf8") as fd:
+        if format == "csv":
+            yield from csv.DictReader(fd)
+            return
+
+        for line in fd:
+            if line.strip():
+                yield json.loads(line)
+
+
+class MigrationReport(object):
+    def __init__(self):
+        """
+        Aggregated progress of a migration.
+        """
+        self.records = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.skipped_chunks = 0
+        self.failed_chunks = 0
+        self.held_chunks = 0
+        self.errors = []
+        self.started_at = time.monotonic()
+        self.finished_at = None
+
+    @property
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    @property
+    def throughput(self):
+        """
+        :return: Records processed per second.
+        """
+        return self.records / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            "{} records in {:.1f}s ({:.1f}/s): {} succeeded, {} failed, "
+            "{} chunks skipped from checkpoint, {} chunks failed, "
+            "{} chunks held back".format(
+                self.records,
+                self.elapsed,
+                self.throughput,
+                self.succeeded,
+                self.failed,
+                self.skipped_chunks,
+                self.failed_chunks,
+                self.held_chunks,
+            )
+        )
+
+
+_chatkit = None
+
+
+def _init_worker(instance_locator, api_key, backend):
+    global _chatkit
+    _chatkit = PusherChatKit(instance_locator, api_key, backend)
+
+
+def _run_chunk(method, records, threads):
+    """
+    Runs in a worker process.
+
+    :param records: List of (sequence number, record).
+
+    :return: tuple of (succeeded, [(sequence number, error)]).
+    """
+    call = getattr(_chatkit, method)
+
+    if method in BATCH_METHODS:
+        try:
+            call([record for _, record in records])
+        except Exception as exc:
+            return 0, [(number, repr(exc)) for number, _ in records]
+
+        return len(records), []
+
+    if threads > 1:
+        calls = {number: partial(call, **record) for number, record in records}
+        results, errors = run_concurrently(
+            calls, max_concurrency=threads, executor=_chatkit.executor
+        )
+
+        return len(results), sorted((n, repr(e)) for n, e in errors.items())
+
+    errors = []
+
+    for number, record in records:
+        try:
+            call(**record)
+        except Exception as exc:
+            errors.append((number, repr(exc)))
+
+    return len(records) - len(errors), errors
+
+
+class MigrationDriver(object):
+    def __init__(
+            self,
+            instance_locator,
+            api_key,
+            backend=RequestsBackend,
+            processes=None,
+            threads=4,
+            chunk_size=100,
+            ordered_by=None,
+            checkpoint_path=None,
+            on_progress=None,
+    ):
+        """
+        Spreads a bulk import over a pool of processes.
+
+        Each worker process has its own PusherChatKit and connection pool, so
+        JSON encoding and token signing are not capped by a single GIL.
+        Records are read lazily and grouped in chunks; only a few chunks per
+        process are in flight at once.
+
+        :param instance_locator: Instance Locator for your ChatKit Instance.
+        :param api_key: API Key of your ChatKit Instance.
+        :param backend: Backend class used by the workers (must be picklable).
+        :param processes: Number of worker processes, defaults to the CPU count.
+        :param threads: Concurrent requests per worker for unordered migrations.
+        :param chunk_size: Number of records per chunk.
+        :param ordered_by: Record field, e.g. 'room_id', whose records must be
+            applied in input order. Records sharing a value always go through
+            the same lane, one chunk at a time, sequentially.
+        :param checkpoint_path: JSON file recording completed chunks; an
+            interrupted migration run again with the same input and settings
+            skips them. Failed records are reported, not retried. Chunks that
+            failed as a whole, e.g. because their worker died, are not
+            recorded, and neither are the chunks of their lane held back
+            after them, so they run again.
+        :param on_progress: Optional callable(MigrationReport) called after each chunk.
+        """
+        self.instance_locator = instance_locator
+        self.api_key = api_key
+        self.backend = backend
+        self.processes = processes or os.cpu_count() or 1
+        self.threads = threads
+        self.chunk_size = chunk_size
+        self.ordered_by = ordered_by
+        self.checkpoint_path = checkpoint_path
+        self.on_progress = on_progress
+
+    def _chunks(self, records):
+        """
+        Groups records into numbered chunks, deterministically for a given
+        input, so chunk numbers stay valid across resumed runs.
+
+        :return: Iterator over (chunk number, lane, [(sequence number, record)]).
+        """
+        lanes = self.processes * LANES_PER_PROCESS if self.ordered_by else 1
+        buffers = {}
+        number = 0
+
+        for sequence, record in enumerate(records):
+            lane = 0
+
+            if self.ordered_by:
+                key = str(record.get(self.ordered_by)).encode("utf8")
+                lane = zlib.crc32(key) % lanes
+
+            buffer = buffers.setdefault(lane, [])
+            buffer.append((sequence, record))
+
+            if len(buffer) >= self.chunk_size:
+                yield number, lane, buffers.pop(lane)
+                number += 1
+
+        for lane, buffer in sorted(buffers.items()):
+            yield number, lane, buffer
+            number += 1
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0, set()
+
+        with open(self.checkpoint_path) as fd:
+            checkpoint = json.load(fd)
+
+        return checkpoint["completed_before"], set(checkpoint["completed"])
+
+    def _save_checkpoint(self, completed_before, completed):
+        if not self.checkpoint_path:
+            return
+
+        tmp_path = self.checkpoint_path + ".tmp"
+
+        with open(tmp_path, "w") as fd:
+            json.dump(
+                {"completed_before": completed_before, "completed": sorted(completed)},
+                fd,
+            )
+
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def run(self, method, records):
+        """
+        Calls a PusherChatKit method for every record.
+
+        :param method: Name of the PusherChatKit method, e.g. 'create_room' or
+            'send_message'. Records are its keyword arguments, except for
+            `batch_create_user` which receives each chunk as its list of users.
+        :param records: Iterable of records, e.g. from `read_records`.
+
+        :return: MigrationReport
+        """
+        if not callable(getattr(PusherChatKit, method, None)):
+            raise ValueError("PusherChatKit has no method {!r}".format(method))
+
+        report = MigrationReport()
+        completed_before, completed = self._load_checkpoint()
+        ordered = self.ordered_by is not None
+        threads = 1 if ordered else self.threads
+        window = self.processes * 2
+
+        pending = deque()
+        busy_lanes = set()
+        # Lanes with a failed chunk: their later chunks would run out of order.
+        failed_lanes = set()
+        in_flight = {}
+        chunks = self._chunks(records)
+        exhausted = False
+
+        with ProcessPoolExecutor(
+                max_workers=self.processes,
+                initializer=_init_worker,
+                initargs=(self.instance_locator, self.api_key, self.backend),
+        ) as pool:
+            while True:
+                while not exhausted and len(pending) + len(in_flight) < window:
+                    try:
+                        number, lane, chunk = next(chunks)
+                    except StopIteration:
+                        exhausted = True
+                        break
+
+                    if number < completed_before or number in completed:
+                        report.skipped_chunks += 1
+                        continue
+
+                    pending.append((number, lane, chunk))
+
+                for _ in range(len(pending)):
+                    number, lane, chunk = pending.popleft()
+
+                    if ordered and lane in failed_lanes:
+                        report.held_chunks += 1
+                        continue
+
+                    if ordered and lane in busy_lanes:
+                        pending.append((number, lane, chunk))
+                        continue
+
+                    busy_lanes.add(lane)
+                    future = pool.submit(_run_chunk, method, chunk, threads)
+                    in_flight[future] = (number, lane, [n for n, _ in chunk])
+
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    number, lane, sequences = in_flight.pop(future)
+                    busy_lanes.discard(lane)
+                    report.records += len(sequences)
+
+                    try:
+                        succeeded, errors = future.result()
+                    except Exception as exc:
+                        # Not checkpointed: the chunk runs again on the next run.
+                        report.failed_chunks += 1
+                        report.failed += len(sequences)
+                        report.errors.extend((n, repr(exc)) for n in sequences)
+                        failed_lanes.add(lane)
+
+                        # A dead worker breaks the pool: stop submitting chunks.
+                        if isinstance(exc, BrokenExecutor):
+                            exhausted = True
+                            report.held_chunks += len(pending)
+                            pending.clear()
+
+                        continue
+
+                    report.succeeded += succeeded
+                    report.failed += len(errors)
+                    report.errors.extend(errors)
+
+                    completed.add(number)
+
+                    while completed_before in completed:
+                        completed.discard(completed_before)
+                        completed_before += 1
+
+                self._save_checkpoint(completed_before, completed)
+
+                if self.on_progress:
+                    self.on_progress(report)
+
+        report.finished_at = time.monotonic()
+
+        return report
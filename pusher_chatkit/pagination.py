@@ -0,0 +1,64 @@
+import inspect
+
+from pusher_chatkit import deadlines
+
+
+class Pager(object):
+    def __init__(self, fetch, advance, cursor=None):
+        """
+        Describes how to walk a paginated endpoint, for `iterate` and
+        `iterate_async`.
+
+        :param fetch: Callable(cursor) requesting a page (may return an awaitable).
+        :param advance: Callable(page, cursor) returning the new items of the
+            page and the cursor of the next one, None when it was the last.
+        :param cursor: Cursor of the first page.
+        """
+        self.fetch = fetch
+        self.advance = advance
+        self.cursor = cursor
+
+
+def iterate(pager, deadline=None):
+    """
+    Iterates over every item of a paginated endpoint.
+
+    :param deadline: Overall budget in seconds shared by all the pages.
+    """
+    cursor = pager.cursor
+    at = deadlines.deadline_at(deadline)
+
+    while True:
+        with deadlines.until(at):
+            page = pager.fetch(cursor)
+
+        items, cursor = pager.advance(page, cursor)
+
+        for item in items:
+            yield item
+
+        if cursor is None:
+            return
+
+
+async def iterate_async(pager, deadline=None):
+    """
+    Asynchronous counterpart of `iterate`, for `async for`.
+    """
+    cursor = pager.cursor
+    at = deadlines.deadline_at(deadline)
+
+    while True:
+        with deadlines.until(at):
+            page = pager.fetch(cursor)
+
+            if inspect.isawaitable(page):
+                page = await page
+
+        items, cursor = pager.advance(page, cursor)
+
+        for item in items:
+            yield item
+
+        if cursor is None:
+            return
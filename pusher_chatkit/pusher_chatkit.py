@@ -1,27 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 import jwt
 
 from datetime import datetime
-from pusher_chatkit import constants
+from functools import partial
+from pusher_chatkit import constants, deadlines
 from pusher_chatkit.backends import RequestsBackend
-from pusher_chatkit.client import PusherChatKitClient
-from pusher_chatkit.exceptions import PusherNotFound
-from pusher_chatkit.messages import MessagePart
+from pusher_chatkit.broadcast import BroadcastResult
+from pusher_chatkit.client import PusherChatKitClient, ValidatorCache
+from pusher_chatkit.concurrency import Parallel, RateLimiter, run_steps
+from pusher_chatkit.events import notifies
+from pusher_chatkit.exceptions import PusherNotFound, PusherPaginationError
+from pusher_chatkit.history import HistoryCache
+from pusher_chatkit.messages import AttachmentMessage, MessagePart, encode_parts
+from pusher_chatkit.pagination import Pager, iterate
+from pusher_chatkit.tokens import TokenCache
+from pusher_chatkit.uploads import FileUpload
+
+
+# Largest `limit` the /users endpoint accepts.
+MAX_USERS_PAGE_SIZE = 100
 
 
 class PusherChatKit(object):
-    def __init__(self, instance_locator, api_key, backend=RequestsBackend):
+    # Drives the `_*_steps` generators behind multi-request helpers.
+    _driver = staticmethod(run_steps)
+    _iterate = staticmethod(iterate)
+
+    def __init__(
+            self,
+            instance_locator,
+            api_key,
+            backend=RequestsBackend,
+            circuit_breaker=None,
+            validator_cache=None,
+            max_workers=32,
+    ):
         """
         Instantiate a new PusherChatKit object.
 
+        Safe to share between threads with the default RequestsBackend.
+
         :param instance_locator: Instance Locator for your ChatKit Instance.
         :param api_key: API Key of your ChatKit Instance.
         :param backend: Backend object you wish to use.
-        """
-        self.client = PusherChatKitClient(backend, instance_locator)
+        :param circuit_breaker: Options of the per-service CircuitBreaker
+            (failure_threshold, recovery_timeout, max_concurrency).
+        :param validator_cache: ValidatorCache used to revalidate GET responses
+            with ETag / Last-Modified, or True for a default one.
+        :param max_workers: Size of the thread pool running the concurrent
+            requests of helpers, which caps their `max_concurrency`.
+        """
+        if validator_cache is True:
+            validator_cache = ValidatorCache()
+
+        self.client = PusherChatKitClient(
+            backend, instance_locator, circuit_breaker, validator_cache
+        )
         self.instance_locator = instance_locator
         self.api_key = api_key
+        self.tokens = TokenCache(self.generate_token)
+        self.listeners = []
+        # Long-lived, so that its threads keep their sessions and connections
+        # between helper calls. Threads are only started when first needed.
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pusher-chatkit"
+        )
+
+    def _run(self, steps, deadline=None):
+        return self._driver(steps, deadline, self.executor)
 
     #
     # TOKENS
@@ -74,6 +122,40 @@ class PusherChatKit(object):
             "expires_in": 24 * 60 * 60,
         }
 
+    #
+    # DEADLINES
+    #
+
+    @staticmethod
+    def deadline(seconds):
+        """
+        Context manager bounding every request made inside it to `seconds`
+        overall; requests past the deadline raise PusherDeadlineExceeded:
+
+            with chatkit.deadline(0.2):
+                user = chatkit.get_user(user_id)
+
+        :param seconds: Budget in seconds.
+        """
+        return deadlines.deadline(seconds)
+
+    #
+    # LISTENERS
+    #
+
+    def add_listener(self, listener):
+        """
+        Registers a callable told about successful changes made through this
+        client, such as role assignments.
+
+        :param listener: Callable(event, arguments, result), `event` being the
+            method name and `arguments` a dict of its arguments.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
     #
     # USERS
     #
@@ -99,7 +181,7 @@ class PusherChatKit(object):
                 "avatar_url": avatar_url,
                 "custom_data": custom_data,
             },
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
     def batch_create_user(self, users):
@@ -114,7 +196,7 @@ class PusherChatKit(object):
             raise Exception("users must be a list of user objects.")
 
         return self.client.post(
-            "api", "/batch_users", body=users, token=self.generate_token(su=True)
+            "api", "/batch_users", body=users, token=self.tokens.get(su=True)
         )
 
     def update_user(self, user_id, name=None, avatar_url=None, custom_data=None):
@@ -143,7 +225,7 @@ class PusherChatKit(object):
             "api",
             "/users/{}".format(user_id),
             body=body,
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
     def delete_user(self, user_id):
@@ -155,7 +237,7 @@ class PusherChatKit(object):
         :return: boolean for success status.
         """
         return self.client.delete(
-            "api", "/users/{}".format(user_id), token=self.generate_token(su=True)
+            "api", "/users/{}".format(user_id), token=self.tokens.get(su=True)
         )
 
     def get_user(self, user_id):
@@ -167,15 +249,16 @@ class PusherChatKit(object):
         :return: User object (dict)
         """
         return self.client.get(
-            "api", "/users/{}".format(user_id), token=self.generate_token(su=True)
+            "api", "/users/{}".format(user_id), token=self.tokens.get(su=True)
         )
 
-    def get_users(self, from_ts=None, limit=None):
+    def get_users(self, from_ts=None, limit=None, lazy=False):
         """
         Retrieves many users from the platform.
 
         :param from_ts: Timestamp (inclusive) from which users with a more recent created_at should be returned.
         :param limit: limit of users to return. must be between1 and 100. If omitted will default to 20.
+        :param lazy: If `true` returns a LazyList, decoding users only when accessed.
 
         :return: List of User objects (dict)
         """
@@ -188,27 +271,91 @@ class PusherChatKit(object):
             params["limit"] = limit
 
         return self.client.get(
-            "api", "/users", query=params, token=self.generate_token(su=True)
+            "api", "/users", query=params, token=self.tokens.get(su=True), lazy=lazy
         )
 
-    def delete_all_users(self):
+    def delete_all_users(self, deadline=None):
         """
         Loops through all users on the platform and deletes them all.
 
+        :param deadline: Overall budget in seconds, shared by all the requests.
+
         :return: True if successful, Exception if not.
         """
+        return self._run(self._delete_all_users_steps(), deadline)
+
+    def _delete_all_users_steps(self):
         while True:
 
-            batch = self.get_users(limit=100)
+            batch = yield self.get_users(limit=100)
 
             if not batch:
                 break
 
             for user in batch:
-                self.delete_user(user["id"])
+                yield self.delete_user(user["id"])
 
         return True
 
+    def iter_users(self, page_size=100, deadline=None):
+        """
+        Iterates over all the users on the platform, page by page.
+
+        Users are paged by creation time: when a whole page shares one
+        created_at, larger pages are requested, up to MAX_USERS_PAGE_SIZE,
+        after which PusherPaginationError is raised rather than skipping users.
+
+        :param page_size: Number of users requested per page.
+        :param deadline: Overall budget in seconds, shared by all the pages.
+
+        :return: Iterator over User objects (dict)
+        """
+        # The cursor is the (created_at, id) of the last user seen, and the
+        # size of the page to request from there.
+        def fetch(cursor):
+            if cursor is None:
+                return self.get_users(limit=page_size)
+
+            return self.get_users(from_ts=cursor[0], limit=cursor[2])
+
+        def advance(users, cursor):
+            users = users or []
+            limit = cursor[2] if cursor else page_size
+            full = len(users) >= limit
+
+            # from_ts is inclusive: skip the users already seen on the previous
+            # page, up to the last one of it.
+            if cursor:
+                ids = [user["id"] for user in users]
+
+                if cursor[1] in ids:
+                    users = users[ids.index(cursor[1]) + 1:]
+
+            if not full:
+                return users, None
+
+            if users:
+                last = users[-1]["created_at"]
+
+                # Keep any larger page while still within the same created_at.
+                if not cursor or last != cursor[0]:
+                    limit = page_size
+
+                return users, (last, users[-1]["id"], limit)
+
+            # Every user on the page shares the cursor's created_at and was
+            # already seen: only a larger page gets past them.
+            if limit >= MAX_USERS_PAGE_SIZE:
+                raise PusherPaginationError(
+                    "More than {} users created at {}, cannot page past them".format(
+                        limit, cursor[0]
+                    )
+                )
+
+            return users, (cursor[0], cursor[1], min(2 * limit, MAX_USERS_PAGE_SIZE))
+
+        return self._iterate(Pager(fetch, advance), deadline)
+
     def get_users_by_id(self, list_of_ids):
         """
         Retrieves several users using their ids.
@@ -221,13 +368,14 @@ class PusherChatKit(object):
             "api",
             "/users_by_ids",
             query={"id": list_of_ids},
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
     #
     # ROOMS
     #
 
+    @notifies
     def create_room(
             self, name, creator_id, private=False, user_ids=None, custom_data=None
     ):
@@ -251,7 +399,7 @@ class PusherChatKit(object):
             body["custom_data"] = custom_data
 
         return self.client.post(
-            "api", "/rooms", body=body, token=self.generate_token(user_id=creator_id)
+            "api", "/rooms", body=body, token=self.tokens.get(user_id=creator_id)
         )
 
     def update_room(self, room_id, name=None, private=False, custom_data=None):
@@ -280,9 +428,10 @@ class PusherChatKit(object):
             "api",
             "/rooms/{}".format(room_id),
             body=body,
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
+    @notifies
     def delete_room(self, room_id):
         """
         Deletes an existing chat room.
@@ -292,7 +441,7 @@ class PusherChatKit(object):
         :return: boolean for success status.
         """
         return self.client.delete(
-            "api", "/rooms/{}".format(room_id), token=self.generate_token(su=True)
+            "api", "/rooms/{}".format(room_id), token=self.tokens.get(su=True)
         )
 
     def get_room(self, room_id):
@@ -304,7 +453,7 @@ class PusherChatKit(object):
         :return: Room object (dict)
         """
         return self.client.get(
-            "api", "/rooms/{}".format(room_id), token=self.generate_token(su=True)
+            "api", "/rooms/{}".format(room_id), token=self.tokens.get(su=True)
         )
 
     def get_rooms(self, from_id=None, include_private=False):
@@ -325,7 +474,7 @@ class PusherChatKit(object):
             params["include_private"] = include_private
 
         return self.client.get(
-            "api", "/rooms", query=params, token=self.generate_token(su=True)
+            "api", "/rooms", query=params, token=self.tokens.get(su=True)
         )
 
     def get_user_rooms(self, user_id):
@@ -337,7 +486,7 @@ class PusherChatKit(object):
         :return: List of Room objects (dict)
         """
         return self.client.get(
-            "api", "/users/{}/rooms".format(user_id), token=self.generate_token(su=True)
+            "api", "/users/{}/rooms".format(user_id), token=self.tokens.get(su=True)
         )
 
     def get_user_joinable_rooms(self, user_id):
@@ -352,9 +501,10 @@ class PusherChatKit(object):
             "api",
             "/users/{}/rooms".format(user_id),
             {"joinable": True},
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
+    @notifies
     def add_users_to_room(self, room_id, list_of_ids):
         """
         Adds multiple users to a chat room.
@@ -368,9 +518,10 @@ class PusherChatKit(object):
             "api",
             "/rooms/{}/users/add".format(room_id),
             body={"user_ids": list_of_ids},
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
+    @notifies
     def remove_users_to_room(self, room_id, list_of_ids):
         """
         Removes multiple users to a chat room.
@@ -384,10 +535,60 @@ class PusherChatKit(object):
             "api",
             "/rooms/{}/users/remove".format(room_id),
             body={"user_ids": list_of_ids},
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
-    def get_room_messages(self, room_id, initial_id=None, limit=None, direction=None):
+    def iter_rooms(self, include_private=False, deadline=None):
+        """
+        Iterates over all the rooms on the platform, page by page.
+
+        :param include_private: If `true` will also iterate over private rooms.
+        :param deadline: Overall budget in seconds, shared by all the pages.
+
+        :return: Iterator over Room objects (dict)
+        """
+
+        def fetch(from_id):
+            return self.get_rooms(from_id=from_id, include_private=include_private)
+
+        def advance(rooms, from_id):
+            rooms = [room for room in rooms or [] if room["id"] != from_id]
+
+            return rooms, rooms[-1]["id"] if rooms else None
+
+        return self._iterate(Pager(fetch, advance), deadline)
+
+    def iter_room_messages(
+            self, room_id, initial_id=None, direction="older", page_size=100, deadline=None
+    ):
+        """
+        Iterates over the messages of a room, page by page.
+
+        :param room_id: Id of the room.
+        :param initial_id: Starting id of the range of messages (non-inclusive).
+        :param direction: Order of messages - one of 'newer' or 'older'.
+        :param page_size: Number of messages requested per page.
+        :param deadline: Overall budget in seconds, shared by all the pages.
+
+        :return: Iterator over Message objects (dict)
+        """
+
+        def fetch(cursor):
+            return self.get_room_messages(room_id, cursor, page_size, direction)
+
+        def advance(messages, cursor):
+            messages = messages or []
+
+            if len(messages) < page_size:
+                return messages, None
+
+            return messages, messages[-1]["id"]
+
+        return self._iterate(Pager(fetch, advance, initial_id), deadline)
+
+    def get_room_messages(
+            self, room_id, initial_id=None, limit=None, direction=None, lazy=False
+    ):
         """
         Retrieves messages for a given room.
 
@@ -395,6 +596,7 @@ class PusherChatKit(object):
         :param initial_id: Starting id of the range of messages (non-inclusive).
         :param limit: Number of messages to return. If left empty, the limit is set to 20 by default.
         :param direction: Order of messages - one of 'newer' or 'older'.
+        :param lazy: If `true` returns a LazyList, decoding messages only when accessed.
 
         :return: List of Message objects (dict)
         """
@@ -413,9 +615,107 @@ class PusherChatKit(object):
             "api",
             "/rooms/{}/messages".format(room_id),
             params,
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
+            lazy=lazy,
+        )
+
+    def get_messages_for_rooms(
+            self,
+            room_ids,
+            limit=None,
+            direction=None,
+            max_concurrency=10,
+            cache=None,
+            deadline=None,
+            return_errors=False,
+    ):
+        """
+        Retrieves messages for many rooms concurrently, e.g. the latest
+        messages of every room of an inbox.
+
+        :param room_ids: Ids of the rooms, or dict of room id -> id of its
+            newest message (None if unknown), used as part of the cache key.
+        :param limit: Number of messages to return per room.
+        :param direction: Order of messages - one of 'newer' or 'older'.
+        :param max_concurrency: Maximum number of requests in flight.
+        :param cache: Optional HistoryCache answering rooms fetched recently.
+        :param deadline: Overall budget in seconds, shared by all the requests.
+        :param return_errors: Return the errors of failed rooms instead of
+            raising the first one.
+
+        :return: dict of room id -> list of Message objects (dict). Raises the
+            first error, if any, unless `return_errors` is set: then a tuple of
+            that dict, without the failed rooms, and a dict of room id ->
+            Exception for them.
+        """
+        return self._run(
+            self._get_messages_for_rooms_steps(
+                room_ids, limit, direction, max_concurrency, cache, return_errors
+            ),
+            deadline,
+        )
+
+    def _get_messages_for_rooms_steps(
+            self, room_ids, limit, direction, max_concurrency, cache, return_errors
+    ):
+        if not isinstance(room_ids, dict):
+            room_ids = dict.fromkeys(room_ids)
+
+        keys = {
+            room_id: HistoryCache.key(room_id, newest_id, limit, direction)
+            for room_id, newest_id in room_ids.items()
+        }
+        cached = {}
+
+        if cache:
+            for room_id, key in keys.items():
+                messages = cache.get(key)
+
+                if messages is not None:
+                    cached[room_id] = messages
+
+        params = {}
+
+        if limit:
+            params["limit"] = limit
+
+        if direction:
+            params["direction"] = direction
+
+        # One token for all the rooms.
+        token = self.tokens.get(su=True)
+
+        fetched, errors = yield Parallel(
+            {
+                room_id: partial(
+                    self.client.get,
+                    "api",
+                    f"/rooms/{room_id}/messages",
+                    params,
+                    token=token,
+                )
+                for room_id in room_ids
+                if room_id not in cached
+            },
+            max_concurrency=max_concurrency,
         )
 
+        if cache:
+            for room_id, messages in fetched.items():
+                if messages is not None:
+                    cache.set(keys[room_id], messages)
+
+        if errors and not return_errors:
+            raise next(iter(errors.values()))
+
+        messages = {
+            room_id: cached[room_id] if room_id in cached else fetched[room_id]
+            for room_id in room_ids
+            if room_id not in errors
+        }
+
+        return (messages, errors) if return_errors else messages
+
     #
     # MESSAGES
     #
@@ -435,17 +735,150 @@ class PusherChatKit(object):
             "api",
             "/rooms/{}/messages".format(room_id),
             body={"sender_id": sender_id, "text": text, "attachment": attachment},
-            token=self.generate_token(user_id=sender_id, su=True),
+            token=self.tokens.get(user_id=sender_id, su=True),
         )
 
     def send_multipart_message(self, sender_id, room_id, parts: List[MessagePart]):
+        """
+        Sends a multipart message in a chat room.
+
+        :param sender_id: Id of the User sending the message.
+        :param room_id: Id of the Room to send the message into.
+        :param parts: List of MessagePart objects making up the message.
+
+        :return: message_id if successful.
+        """
         return self.client.post(
             "chatkit_v4",
             f"/rooms/{room_id}/messages",
-            body={"parts": [part.as_dict() for part in parts]},
-            token=self.generate_token(user_id=sender_id, su=True),
+            body=encode_parts(parts),
+            token=self.tokens.get(user_id=sender_id, su=True),
         )
 
+    def upload_attachment(
+            self, sender_id, room_id, upload, custom_data=None, deadline=None
+    ):
+        """
+        Uploads a file to be sent as an attachment in a chat room.
+
+        The file is streamed from disk rather than loaded into memory.
+
+        :param sender_id: Id of the User who will send the attachment.
+        :param room_id: Id of the Room the attachment will be sent into.
+        :param upload: FileUpload object, or path of the file to upload.
+        :param custom_data: Custom data that will be associated with the attachment.
+        :param deadline: Overall budget in seconds, shared by all the requests.
+
+        :return: AttachmentMessage part to include in a multipart message.
+        """
+        return self._run(
+            self._upload_attachment_steps(sender_id, room_id, upload, custom_data),
+            deadline,
+        )
+
+    def _upload_attachment_steps(self, sender_id, room_id, upload, custom_data):
+        if not isinstance(upload, FileUpload):
+            upload = FileUpload(upload)
+
+        body = {
+            "content_type": upload.content_type,
+            "content_length": upload.content_length,
+            "name": upload.name,
+        }
+
+        if custom_data:
+            body["custom_data"] = custom_data
+
+        attachment = yield self.client.post(
+            "chatkit_v4",
+            f"/rooms/{room_id}/attachments",
+            body=body,
+            token=self.tokens.get(user_id=sender_id, su=True),
+        )
+        yield self.client.upload(attachment["upload_url"], upload)
+
+        return AttachmentMessage(attachment["attachment_id"], upload.content_type)
+
+    def broadcast_message(
+            self,
+            sender_id,
+            room_ids,
+            parts: List[MessagePart],
+            max_concurrency=10,
+            rate_limit=None,
+            resume=None,
+            on_result=None,
+            deadline=None,
+    ):
+        """
+        Sends the same multipart message to many chat rooms.
+
+        The body is encoded and the sender's token signed only once for the
+        whole broadcast. Rooms already delivered to in `resume` are skipped,
+        so a partially completed broadcast can be retried with its result.
+
+        :param sender_id: Id of the User sending the message.
+        :param room_ids: Ids of the Rooms to send the message into.
+        :param parts: List of MessagePart objects making up the message.
+        :param max_concurrency: Maximum number of requests in flight.
+        :param rate_limit: Maximum number of requests started per second.
+        :param resume: BroadcastResult of a previous, partial broadcast.
+        :param on_result: Optional callable(room_id, response, error) called as each room completes.
+        :param deadline: Overall budget in seconds; rooms not sent in time fail
+            with PusherDeadlineExceeded and can be resumed.
+
+        :return: BroadcastResult with message ids and errors per room.
+        """
+        return self._run(
+            self._broadcast_message_steps(
+                sender_id,
+                room_ids,
+                parts,
+                max_concurrency,
+                rate_limit,
+                resume,
+                on_result,
+            ),
+            deadline,
+        )
+
+    def _broadcast_message_steps(
+            self, sender_id, room_ids, parts, max_concurrency, rate_limit, resume, on_result
+    ):
+        result = BroadcastResult(
+            resume.message_ids if resume else None,
+            resume.errors if resume else None,
+        )
+        body = encode_parts(parts)
+        token = self.tokens.get(user_id=sender_id, su=True)
+
+        calls = {
+            room_id: partial(
+                self.client.post,
+                "chatkit_v4",
+                f"/rooms/{room_id}/messages",
+                body=body,
+                token=token,
+            )
+            for room_id in room_ids
+            if room_id not in result.message_ids
+        }
+
+        def record(room_id, response, error):
+            result.record(room_id, response, error)
+
+            if on_result:
+                on_result(room_id, response, error)
+
+        yield Parallel(
+            calls,
+            max_concurrency=max_concurrency,
+            rate_limiter=RateLimiter(rate_limit) if rate_limit else None,
+            on_result=record,
+        )
+
+        return result
+
     def delete_message(self, message_id):
         """
         Deletes a message in a chat room.
@@ -455,13 +888,14 @@ class PusherChatKit(object):
         :return: boolean for success status.
         """
         return self.client.delete(
-            "api", "/messages/{}".format(message_id), token=self.generate_token(su=True)
+            "api", "/messages/{}".format(message_id), token=self.tokens.get(su=True)
         )
 
     #
     # ROLES AND PERMISSIONS
     #
 
+    @notifies
     def create_room_role(self, role_name, permissions=None):
         """
         Create a new role within a specific room only.
@@ -479,9 +913,10 @@ class PusherChatKit(object):
                 "name": role_name,
                 "permissions": permissions if permissions else [],
             },
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
+    @notifies
     def create_global_role(self, role_name, permissions=None):
         """
         Create a new global role.
@@ -499,9 +934,10 @@ class PusherChatKit(object):
                 "name": role_name,
                 "permissions": permissions if permissions else [],
             },
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
+    @notifies
     def delete_room_role(self, role_name):
         """
         Deletes a room-specific role.
@@ -513,9 +949,10 @@ class PusherChatKit(object):
         return self.client.delete(
             "authorizer",
             "/roles/{}/scope/{}".format(role_name, constants.ROOM_SCOPE),
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
+    @notifies
     def delete_global_role(self, role_name):
         """
         Deletes a global role.
@@ -527,9 +964,10 @@ class PusherChatKit(object):
         return self.client.delete(
             "authorizer",
             "/roles/{}/scope/{}".format(role_name, constants.GLOBAL_SCOPE),
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
+    @notifies
     def assign_room_role_to_user(self, role_name, user_id, room_id):
         """
         Assigns a room-specific role to a user.
@@ -544,9 +982,10 @@ class PusherChatKit(object):
             "authorizer",
             "/users/{}/roles".format(user_id),
             body={"name": role_name, "room_id": room_id},
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
+    @notifies
     def assign_global_role_to_user(self, role_name, user_id):
         """
         Assigns a global role to a user.
@@ -560,9 +999,10 @@ class PusherChatKit(object):
             "authorizer",
             "/users/{}/roles".format(user_id),
             body={"name": role_name},
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
+    @notifies
     def remove_room_role_to_user(self, role_name, user_id, room_id):
         """
         Removes a room-specific role to a user.
@@ -577,9 +1017,10 @@ class PusherChatKit(object):
             "authorizer",
             "/users/{}/roles".format(user_id),
             body={"name": role_name, "room_id": room_id},
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
+    @notifies
     def remove_global_role_to_user(self, role_name, user_id):
         """
         Removes a global role to a user.
@@ -593,7 +1034,7 @@ class PusherChatKit(object):
             "authorizer",
             "/users/{}/roles".format(user_id),
             body={"name": role_name},
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
     def list_all_roles(self):
@@ -603,7 +1044,7 @@ class PusherChatKit(object):
         :return: List of Role objects (dict)
         """
         return self.client.get(
-            "authorizer", "/roles", token=self.generate_token(su=True)
+            "authorizer", "/roles", token=self.tokens.get(su=True)
         )
 
     def list_user_roles(self, user_id):
@@ -617,7 +1058,7 @@ class PusherChatKit(object):
         return self.client.get(
             "authorizer",
             "/users/{}/roles".format(user_id),
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
     def list_permissions_for_room_role(self, role_name):
@@ -631,7 +1072,7 @@ class PusherChatKit(object):
         return self.client.get(
             "authorizer",
             "/roles/{}/scope/{}/permissions".format(role_name, constants.ROOM_SCOPE),
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
     def list_permissions_for_global_role(self, role_name):
@@ -645,9 +1086,10 @@ class PusherChatKit(object):
         return self.client.get(
             "authorizer",
             "/roles/{}/scope/{}/permissions".format(role_name, constants.GLOBAL_SCOPE),
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
+    @notifies
     def update_permissions_for_room_role(
             self, role_name, permissions_to_add=None, permissions_to_remove=None
     ):
@@ -667,9 +1109,10 @@ class PusherChatKit(object):
                 "permissions_to_add": permissions_to_add,
                 "permissions_to_remove": permissions_to_remove,
             },
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
+    @notifies
     def update_permissions_for_global_role(
             self, role_name, permissions_to_add=None, permissions_to_remove=None
     ):
@@ -689,7 +1132,7 @@ class PusherChatKit(object):
                 "permissions_to_add": permissions_to_add,
                 "permissions_to_remove": permissions_to_remove,
             },
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
     #
@@ -708,7 +1151,7 @@ class PusherChatKit(object):
         return self.client.get(
             "cursors",
             "/cursors/0/rooms/{}/users/{}".format(room_id, user_id),
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
     def set_user_read_cursors(self, user_id, room_id, position):
@@ -725,7 +1168,7 @@ class PusherChatKit(object):
             "cursors",
             "/cursors/0/rooms/{}/users/{}".format(room_id, user_id),
             body={"position": position},
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
     def get_room_read_cursor(self, room_id):
@@ -739,7 +1182,7 @@ class PusherChatKit(object):
         return self.client.get(
             "cursors",
             "/cursors/0/rooms/{}".format(room_id),
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
     def get_user_read_cursor(self, user_id):
@@ -753,26 +1196,30 @@ class PusherChatKit(object):
         return self.client.get(
             "cursors",
             "/cursors/0/users/{}".format(user_id),
-            token=self.generate_token(su=True),
+            token=self.tokens.get(su=True),
         )
 
     #
     # SEARCH
     #
 
-    def search_rooms_by_name(self, room_name):
+    def search_rooms_by_name(self, room_name, deadline=None):
         """
         Search through all rooms in your instances.
 
         :param room_name: The name of the room we need to look for.
+        :param deadline: Overall budget in seconds, shared by all the requests.
 
         :return: Room object (dict) or None
         """
+        return self._run(self._search_rooms_by_name_steps(room_name), deadline)
+
+    def _search_rooms_by_name_steps(self, room_name):
         from_id = 0
 
         while True:
             try:
-                rooms = self.get_rooms(from_id=from_id, include_private=True)
+                rooms = yield self.get_rooms(from_id=from_id, include_private=True)
 
                 if not rooms:
                     break
@@ -0,0 +1,276 @@
+from collections import namedtuple
+from functools import partial
+
+from pusher_chatkit import constants
+from pusher_chatkit.concurrency import Parallel, gather_steps
+from pusher_chatkit.roles import role_name, role_scope
+
+
+# Changes are applied phase by phase: roles must exist before they are
+# assigned, and must be unassigned before they are deleted.
+ROLES_PHASE = 0
+ASSIGNMENTS_PHASE = 1
+PRUNE_PHASE = 2
+
+
+class Change(namedtuple("Change", "phase method kwargs")):
+    """
+    A single PusherChatKit call needed to reach the desired state.
+    """
+
+    def __str__(self):
+        return "{}({})".format(
+            self.method,
+            ", ".join("{}={!r}".format(k, v) for k, v in sorted(self.kwargs.items())),
+        )
+
+
+class ReconcilePlan(object):
+    def __init__(self, changes):
+        """
+        Changes computed by `RoleReconciler.plan`.
+
+        :param changes: List of Change objects.
+        """
+        self.changes = sorted(changes, key=lambda change: change.phase)
+        self.errors = []
+
+    def __len__(self):
+        return len(self.changes)
+
+    def report(self):
+        """
+        :return: Human readable summary of the changes, one per line.
+        """
+        if not self.changes:
+            return "No changes."
+
+        lines = ["{} change(s):".format(len(self.changes))]
+        lines.extend("  {}".format(change) for change in self.changes)
+
+        for change, error in self.errors:
+            lines.append("  FAILED {}: {!r}".format(change, error))
+
+        return "\n".join(lines)
+
+
+class RoleReconciler(object):
+    def __init__(self, chatkit, max_concurrency=10):
+        """
+        Brings roles, permissions and role assignments to a desired state
+        with as few requests as possible.
+
+        The current state is fetched concurrently, compared locally and only
+        the differences are applied, concurrently within each phase.
+
+        :param chatkit: PusherChatKit or AsyncPusherChatKit.
+        :param max_concurrency: Maximum number of requests in flight.
+        """
+        self.chatkit = chatkit
+        self.max_concurrency = max_concurrency
+
+    def plan(self, roles, user_roles=None, prune=False):
+        """
+        Computes the changes needed to reach the desired state.
+
+        :param roles: List of role dicts with `name`, `scope` ('global' or
+            'room') and `permissions`.
+        :param user_roles: dict of user_id -> {"global": role_name or None,
+            "rooms": {room_id: role_name}}. Only users listed here are managed:
+            their other assignments are removed.
+        :param prune: Delete existing roles missing from `roles`.
+
+        :return: ReconcilePlan
+        """
+        return self.chatkit._run(self._plan_steps(roles, user_roles or {}, prune))
+
+    def apply(self, plan):
+        """
+        Applies a plan. Phases are applied in order and a phase with errors
+        stops the following ones.
+
+        :param plan: ReconcilePlan returned by `plan`.
+
+        :return: The plan, with `errors` listing (change, exception) of failed changes.
+        """
+        return self.chatkit._run(self._apply_steps(plan))
+
+    def reconcile(self, roles, user_roles=None, prune=False, dry_run=False):
+        """
+        Plans then, unless `dry_run`, applies the changes.
+
+        :return: ReconcilePlan
+        """
+        return self.chatkit._run(
+            self._reconcile_steps(roles, user_roles or {}, prune, dry_run)
+        )
+
+    def _reconcile_steps(self, roles, user_roles, prune, dry_run):
+        plan = yield from self._plan_steps(roles, user_roles, prune)
+
+        if not dry_run:
+            yield from self._apply_steps(plan)
+
+        return plan
+
+    def _plan_steps(self, roles, user_roles, prune):
+        calls = {("roles",): self.chatkit.list_all_roles}
+        calls.update(
+            {
+                ("user", user_id): partial(self.chatkit.list_user_roles, user_id)
+                for user_id in user_roles
+            }
+        )
+        fetched = yield from gather_steps(calls, self.max_concurrency)
+
+        current = {
+            (role_scope(role), role_name(role)): role
+            for role in fetched[("roles",)] or []
+        }
+        desired = {(role["scope"], role["name"]): role for role in roles}
+
+        # Permissions are usually listed with the roles, fetch the missing ones.
+        missing = [
+            key
+            for key in desired
+            if key in current and "permissions" not in current[key]
+        ]
+        permissions = yield from gather_steps(
+            {
+                (scope, name): partial(
+                    getattr(self.chatkit, "list_permissions_for_{}_role".format(scope)),
+                    name,
+                )
+                for scope, name in missing
+            },
+            self.max_concurrency,
+        )
+
+        changes = []
+
+        for (scope, name), role in desired.items():
+            wanted = set(role.get("permissions") or [])
+
+            if (scope, name) not in current:
+                changes.append(
+                    Change(
+                        ROLES_PHASE,
+                        "create_{}_role".format(scope),
+                        {"role_name": name, "permissions": sorted(wanted)},
+                    )
+                )
+                continue
+
+            existing = permissions.get(
+                (scope, name), current[(scope, name)].get("permissions")
+            )
+            existing = set(existing or [])
+
+            if wanted != existing:
+                changes.append(
+                    Change(
+                        ROLES_PHASE,
+                        "update_permissions_for_{}_role".format(scope),
+                        {
+                            "role_name": name,
+                            "permissions_to_add": sorted(wanted - existing) or None,
+                            "permissions_to_remove": sorted(existing - wanted) or None,
+                        },
+                    )
+                )
+
+        if prune:
+            for scope, name in current:
+                if (scope, name) not in desired:
+                    changes.append(
+                        Change(
+                            PRUNE_PHASE,
+                            "delete_{}_role".format(scope),
+                            {"role_name": name},
+                        )
+                    )
+
+        for user_id, wanted in user_roles.items():
+            assigned = fetched[("user", user_id)] or []
+            changes.extend(self._assignment_changes(user_id, wanted, assigned))
+
+        return ReconcilePlan(changes)
+
+    def _assignment_changes(self, user_id, wanted, assigned):
+        current_global = None
+        current_rooms = {}
+
+        for role in assigned:
+            if role_scope(role) == constants.ROOM_SCOPE:
+                current_rooms[role.get("room_id")] = role_name(role)
+            else:
+                current_global = role_name(role)
+
+        wanted_global = wanted.get("global")
+        wanted_rooms = wanted.get("rooms") or {}
+        changes = []
+
+        if wanted_global != current_global:
+            if wanted_global:
+                changes.append(
+                    Change(
+                        ASSIGNMENTS_PHASE,
+                        "assign_global_role_to_user",
+                        {"role_name": wanted_global, "user_id": user_id},
+                    )
+                )
+            else:
+                changes.append(
+                    Change(
+                        ASSIGNMENTS_PHASE,
+                        "remove_global_role_to_user",
+                        {"role_name": current_global, "user_id": user_id},
+                    )
+                )
+
+        for room_id, wanted_role in wanted_rooms.items():
+            if current_rooms.get(room_id) != wanted_role:
+                changes.append(
+                    Change(
+                        ASSIGNMENTS_PHASE,
+                        "assign_room_role_to_user",
+                        {
+                            "role_name": wanted_role,
+                            "user_id": user_id,
+                            "room_id": room_id,
+                        },
+                    )
+                )
+
+        for room_id, current_role in current_rooms.items():
+            if room_id not in wanted_rooms:
+                changes.append(
+                    Change(
+                        ASSIGNMENTS_PHASE,
+                        "remove_room_role_to_user",
+                        {
+                            "role_name": current_role,
+                            "user_id": user_id,
+                            "room_id": room_id,
+                        },
+                    )
+                )
+
+        return changes
+
+    def _apply_steps(self, plan):
+        for phase in sorted({change.phase for change in plan.changes}):
+            changes = [change for change in plan.changes if change.phase == phase]
+            _, errors = yield Parallel(
+                {
+                    index: partial(getattr(self.chatkit, change.method), **change.kwargs)
+                    for index, change in enumerate(changes)
+                },
+                max_concurrency=self.max_concurrency,
+            )
+            plan.errors.extend((changes[index], error) for index, error in errors.items())
+
+            if errors:
+                break
+
+        return plan
@@ -0,0 +1,12 @@
+def role_name(role):
+    """
+    :return: Name of a role returned by the API, which spells it either way.
+    """
+    return role.get("name") or role.get("role_name")
+
+
+def role_scope(role):
+    """
+    :return: Scope of a role returned by the API, which spells it either way.
+    """
+    return role.get("scope") or role.get("scope_type")
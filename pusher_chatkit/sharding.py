@@ -0,0 +1,200 @@
+import bisect
+import hashlib
+import inspect
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pusher_chatkit.backends import RequestsBackend
+from pusher_chatkit.concurrency import Parallel
+from pusher_chatkit.pusher_chatkit import PusherChatKit
+
+
+# Instance-wide calls, sent to every shard by `fan_out`.
+FAN_OUT_METHODS = (
+    "list_all_roles",
+    "create_room_role",
+    "create_global_role",
+    "delete_room_role",
+    "delete_global_role",
+    "list_permissions_for_room_role",
+    "list_permissions_for_global_role",
+    "update_permissions_for_room_role",
+    "update_permissions_for_global_role",
+    "get_users",
+    "get_rooms",
+    "delete_all_users",
+    "search_rooms_by_name",
+)
+
+
+class HashRing(object):
+    def __init__(self, nodes=(), replicas=100):
+        """
+        Consistent hash ring.
+
+        Each node is placed `replicas` times on the ring, so adding or removing
+        a node only moves about 1/N of the keys.
+
+        :param nodes: Initial node names.
+        :param replicas: Number of points per node on the ring.
+        """
+        self.replicas = replicas
+        self._hashes = []
+        self._nodes = []
+
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.md5(value.encode("utf8")).digest()[:8], "big")
+
+    def add(self, node):
+        for i in range(self.replicas):
+            point = self._hash("{}#{}".format(node, i))
+            index = bisect.bisect(self._hashes, point)
+            self._hashes.insert(index, point)
+            self._nodes.insert(index, node)
+
+    def remove(self, node):
+        keep = [(h, n) for h, n in zip(self._hashes, self._nodes) if n != node]
+        self._hashes = [h for h, _ in keep]
+        self._nodes = [n for _, n in keep]
+
+    def get(self, key):
+        """
+        :param key: Routing key.
+
+        :return: Name of the node owning the key.
+        """
+        if not self._hashes:
+            raise LookupError("The hash ring is empty.")
+
+        index = bisect.bisect(self._hashes, self._hash(str(key)))
+
+        return self._nodes[index % len(self._nodes)]
+
+
+class ShardedPusherChatKit(object):
+    def __init__(
+            self,
+            shards,
+            backend=RequestsBackend,
+            chatkit_class=PusherChatKit,
+            key_func=None,
+            replicas=100,
+            circuit_breaker=None,
+    ):
+        """
+        Spreads tenants over several ChatKit instances.
+
+        Calls are routed to a shard by consistent hashing of their tenant key:
+        `shard_key=` when given, otherwise what `key_func` returns for the
+        call. Rooms, their members and their messages must live on the same
+        instance, so there is no fallback on the room, user or creator ids of
+        a call: a call without a tenant key raises ValueError.
+
+        Every shard has its own client, connection pool and token cache.
+        Instance-wide calls in `FAN_OUT_METHODS` go to every shard and return
+        a dict of shard name -> result.
+
+        :param shards: dict of shard name -> (instance_locator, api_key).
+        :param backend: Backend object used by every shard.
+        :param chatkit_class: PusherChatKit or AsyncPusherChatKit.
+        :param key_func: Optional callable(method_name, arguments) returning the
+            tenant key of a call, `arguments` being a dict of its arguments,
+            or None if it cannot tell.
+        :param replicas: Number of points per shard on the hash ring.
+        :param circuit_breaker: Options of each shard's per-service CircuitBreaker.
+        """
+        self.backend = backend
+        self.chatkit_class = chatkit_class
+        self.key_func = key_func
+        self.circuit_breaker = circuit_breaker
+        self.shards = {}
+        self.ring = HashRing(replicas=replicas)
+        self._signatures = {}
+        # Long-lived, so that fanned out calls reuse each shard's connections.
+        self.executor = ThreadPoolExecutor(thread_name_prefix="pusher-chatkit-shards")
+
+        for name, (instance_locator, api_key) in shards.items():
+            self.add_shard(name, instance_locator, api_key)
+
+    def add_shard(self, name, instance_locator, api_key):
+        if name in self.shards:
+            raise ValueError("Shard {} already exists.".format(name))
+
+        self.shards[name] = self.chatkit_class(
+            instance_locator, api_key, self.backend, self.circuit_breaker
+        )
+        self.ring.add(name)
+
+    def remove_shard(self, name):
+        self.ring.remove(name)
+        return self.shards.pop(name)
+
+    def shard_for(self, key):
+        """
+        :param key: Tenant, room or user key.
+
+        :return: PusherChatKit of the shard owning the key.
+        """
+        return self.shards[self.ring.get(key)]
+
+    def routing_key(self, method_name, args, kwargs):
+        if method_name not in self._signatures:
+            method = getattr(self.chatkit_class, method_name)
+            self._signatures[method_name] = inspect.signature(method)
+
+        arguments = self._signatures[method_name].bind(None, *args, **kwargs).arguments
+
+        key = self.key_func(method_name, arguments) if self.key_func else None
+
+        if key is None:
+            raise ValueError(
+                "Cannot route {}: pass shard_key= or a key_func returning "
+                "its tenant key.".format(method_name)
+            )
+
+        return key
+
+    def fan_out(self, method_name, *args, **kwargs):
+        """
+        Calls a method on every shard concurrently.
+
+        :return: dict of shard name -> result. Raises the first error, if any.
+        """
+        return self.chatkit_class._driver(
+            self._fan_out_steps(method_name, args, kwargs), None, self.executor
+        )
+
+    def _fan_out_steps(self, method_name, args, kwargs):
+        results, errors = yield Parallel(
+            {
+                name: partial(getattr(chatkit, method_name), *args, **kwargs)
+                for name, chatkit in self.shards.items()
+            },
+            max_concurrency=len(self.shards),
+        )
+
+        if errors:
+            raise next(iter(errors.values()))
+
+        return results
+
+    def __getattr__(self, method_name):
+        if method_name.startswith("_") or not callable(
+                getattr(self.chatkit_class, method_name, None)
+        ):
+            raise AttributeError(method_name)
+
+        if method_name in FAN_OUT_METHODS:
+            return partial(self.fan_out, method_name)
+
+        def routed(*args, shard_key=None, **kwargs):
+            if shard_key is None:
+                shard_key = self.routing_key(method_name, args, kwargs)
+
+            return getattr(self.shard_for(shard_key), method_name)(*args, **kwargs)
+
+        return routed
@@ -0,0 +1,396 @@
+"""
+Thread-safety stress benchmark.
+
+Shares one PusherChatKit between threads making a mix of calls against a
+local stand-in server, checks that every response answers its own request,
+and reports how throughput scales with the number of threads:
+
+    python -m pusher_chatkit.stress --threads 1,2,4,8,16,32,64 --requests 4000
+
+Fails on errors, cross-talk, or a scaling efficiency (speedup over one thread
+divided by the number of threads) below `--min-efficiency` for up to
+`--min-efficiency-threads` threads. Past that the client is bound by the GIL:
+with 20ms of latency, efficiency drops from about 80% at 8 threads to about
+45% at 32, and throughput stops growing.
+"""
+import argparse
+import base64
+import json
+import multiprocessing
+import random
+import sys
+import threading
+import time
+import uuid
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from pusher_chatkit.pusher_chatkit import PusherChatKit
+
+
+class CrossTalk(Exception):
+    """
+    A response answering another request than the one made.
+    """
+
+
+#
+# STAND-IN SERVER
+#
+# Answers the few endpoints used below, echoing what identifies each request
+# (path, token subject, body) so responses can be checked against it.
+#
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in one segment, not waiting on delayed ACKs.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload=None, headers=None):
+        body = b"" if payload is None else json.dumps(payload).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _subject(self):
+        token = self.headers.get("Authorization", "").split(" ")[-1]
+
+        try:
+            claims = token.split(".")[1]
+            claims += "=" * (-len(claims) % 4)
+            return json.loads(base64.urlsafe_b64decode(claims)).get("sub")
+        except (IndexError, ValueError):
+            return None
+
+    def _route(self, method):
+        url = urlsplit(self.path)
+        # /services/<service>/<version>/<instance>/<endpoint...>
+        parts = url.path.split("/")[5:]
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        time.sleep(self.server.latency)
+
+        if method == "GET" and len(parts) == 2 and parts[0] == "users":
+            etag = '"{}"'.format(parts[1])
+
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304)
+
+            return self._send(200, {"id": parts[1]}, {"ETag": etag})
+
+        if len(parts) == 3 and parts[0] == "rooms" and parts[2] == "messages":
+            if method == "GET":
+                limit = int(query.get("limit", 20))
+                return self._send(
+                    200,
+                    [{"id": i, "room_id": parts[1]} for i in range(limit, 0, -1)],
+                )
+
+            if method == "POST":
+                return self._send(
+                    201,
+                    {
+                        "message_id": 1,
+                        "room_id": parts[1],
+                        "user_id": self._subject(),
+                        "text": body.get("text"),
+                    },
+                )
+
+        return self._send(404, {"error": "not_found"})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, latency):
+        super().__init__(address, StandInHandler)
+        self.latency = latency
+
+
+def serve(latency, connection):
+    """
+    Runs the stand-in server until the process is terminated, sending its
+    port through `connection`.
+    """
+    server = StandInServer(("127.0.0.1", 0), latency)
+    connection.send(server.server_address[1])
+    server.serve_forever()
+
+
+def start_server(latency):
+    """
+    Starts the stand-in server in its own process, so that it does not compete
+    with the client threads for the GIL.
+
+    :return: tuple of (process, port).
+    """
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=serve, args=(latency, sender), daemon=True)
+    process.start()
+
+    return process, receiver.recv()
+
+
+#
+# OPERATIONS
+#
+# Each operation makes a call and raises CrossTalk if its response does not
+# match the request.
+#
+
+
+def _check(condition, name, detail):
+    if not condition:
+        raise CrossTalk("{}: {}".format(name, detail))
+
+
+def _get_user(chatkit, rng, args):
+    user_id = "user-{}".format(rng.randrange(args.users))
+    user = chatkit.get_user(user_id)
+    _check(user["id"] == user_id, "get_user", (user_id, user))
+
+
+def _get_room_messages(chatkit, rng, args):
+    room_id = "room-{}".format(rng.randrange(args.rooms))
+    limit = rng.randint(1, 50)
+    messages = chatkit.get_room_messages(room_id, limit=limit)
+    _check(
+        len(messages) == limit and all(m["room_id"] == room_id for m in messages),
+        "get_room_messages",
+        (room_id, limit, messages[:1]),
+    )
+
+
+def _lazy_room_messages(chatkit, rng, args):
+    room_id = "room-{}".format(rng.randrange(args.rooms))
+    limit = rng.randint(1, 50)
+    messages = chatkit.get_room_messages(room_id, limit=limit, lazy=True)
+    _check(
+        messages.ids() == list(range(limit, 0, -1)) and messages[0]["room_id"] == room_id,
+        "lazy_room_messages",
+        (room_id, limit),
+    )
+
+
+def _send_message(chatkit, rng, args):
+    sender_id = "user-{}".format(rng.randrange(args.users))
+    room_id = "room-{}".format(rng.randrange(args.rooms))
+    text = uuid.UUID(int=rng.getrandbits(128)).hex
+    message = chatkit.send_message(sender_id, room_id, text)
+    _check(
+        (message["user_id"], message["room_id"], message["text"])
+        == (sender_id, room_id, text),
+        "send_message",
+        (sender_id, room_id, text, message),
+    )
+
+
+OPERATIONS = (_get_user, _get_room_messages, _lazy_room_messages, _send_message)
+
+
+#
+# RUNNER
+#
+
+
+def run(chatkit, threads, args):
+    """
+    Makes `args.requests` calls spread over `threads` threads sharing `chatkit`.
+
+    :return: dict of the elapsed time, throughput, errors and cross-talk.
+    """
+    per_thread = max(1, args.requests // threads)
+    lock = threading.Lock()
+    errors = []
+    cross_talk = []
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        barrier.wait()
+
+        for _ in range(per_thread):
+            try:
+                rng.choice(OPERATIONS)(chatkit, rng, args)
+            except CrossTalk as exc:
+                with lock:
+                    cross_talk.append(exc)
+            except Exception as exc:
+                with lock:
+                    errors.append(exc)
+
+    workers = [
+        threading.Thread(target=worker, args=(args.seed + i,), daemon=True)
+        for i in range(threads)
+    ]
+
+    for thread in workers:
+        thread.start()
+
+    barrier.wait()
+    started = time.monotonic()
+
+    for thread in workers:
+        thread.join()
+
+    elapsed = time.monotonic() - started
+    count = per_thread * threads
+
+    return {
+        "threads": threads,
+        "count": count,
+        "elapsed": round(elapsed, 3),
+        "throughput": count / elapsed,
+        "errors": len(errors),
+        "cross_talk": len(cross_talk),
+        "samples": [repr(exc) for exc in (cross_talk + errors)[:3]],
+    }
+
+
+def add_scaling(result, baseline):
+    """
+    Adds the speedup and efficiency of `result` over `baseline`, the
+    throughput of a single thread.
+    """
+    result["speedup"] = result["throughput"] / baseline if baseline else 0.0
+    result["efficiency"] = result["speedup"] / result["threads"]
+
+
+def format_result(result):
+    return "{:>7} {:>10.1f} {:>8.2f}x {:>9.0%} {:>7} {:>10}".format(
+        result["threads"],
+        result["throughput"],
+        result["speedup"],
+        result["efficiency"],
+        result["errors"],
+        result["cross_talk"],
+    )
+
+
+def below_efficiency(result, args):
+    return (
+        result["threads"] <= args.min_efficiency_threads
+        and result["efficiency"] < args.min_efficiency
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m pusher_chatkit.stress",
+        description="Stress a PusherChatKit shared between threads.",
+    )
+    parser.add_argument(
+        "--threads", default="1,2,4,8,16,32,64", help="Comma separated thread counts."
+    )
+    parser.add_argument(
+        "--requests", type=int, default=4000, help="Calls per thread count."
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.02,
+        help="Seconds the stand-in server waits before answering.",
+    )
+    parser.add_argument(
+        "--min-efficiency",
+        type=float,
+        default=0.5,
+        help="Lowest acceptable speedup per thread, e.g. 0.5 for 50%%.",
+    )
+    parser.add_argument(
+        "--min-efficiency-threads",
+        type=int,
+        default=16,
+        help="Highest thread count --min-efficiency applies to.",
+    )
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--json", metavar="PATH", help="Write the results as JSON ('-' for stdout)."
+    )
+
+    args = parser.parse_args(argv)
+    args.threads = [int(count) for count in args.threads.split(",")]
+
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    process, port = start_server(args.latency)
+    text_output = sys.stderr if args.json == "-" else sys.stdout
+
+    chatkit = PusherChatKit("v1:local:stress", "stress:secret", validator_cache=True)
+    chatkit.client.scheme = "http"
+    chatkit.client.host = "127.0.0.1:{}".format(port)
+
+    results = []
+    baseline = None
+
+    print(
+        "threads      ops/s  speedup efficiency  errors cross-talk", file=text_output
+    )
+
+    try:
+        for threads in args.threads:
+            result = run(chatkit, threads, args)
+            results.append(result)
+
+            if baseline is None:
+                baseline = result["throughput"] / threads
+
+            add_scaling(result, baseline)
+            print(format_result(result), file=text_output)
+
+            if below_efficiency(result, args):
+                print(
+                    "    efficiency below {:.0%}".format(args.min_efficiency),
+                    file=text_output,
+                )
+
+            for sample in result["samples"]:
+                print("    " + sample, file=text_output)
+    finally:
+        chatkit.client.http.close()
+        process.terminate()
+
+    if args.json:
+        if args.json == "-":
+            json.dump(results, sys.stdout, indent=2)
+        else:
+            with open(args.json, "w") as fd:
+                json.dump(results, fd, indent=2)
+
+    failed = any(
+        result["errors"] or result["cross_talk"] or below_efficiency(result, args)
+        for result in results
+    )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
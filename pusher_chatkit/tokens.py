@@ -0,0 +1,46 @@
+import time
+
+from pusher_chatkit.lru import LRUCache
+
+
+class TokenCache(object):
+    def __init__(self, generate, refresh_margin=60 * 60, max_size=10000):
+        """
+        Caches signed tokens until shortly before they expire.
+
+        Safe to share between threads.
+
+        :param generate: Callable(user_id=None, su=None) returning a token dict.
+        :param refresh_margin: Seconds before expiry at which a token is re-signed.
+        :param max_size: Maximum number of tokens kept, least recently used are dropped.
+        """
+        self.generate = generate
+        self.refresh_margin = refresh_margin
+        self._tokens = LRUCache(max_size)
+
+    def get(self, user_id=None, su=None):
+        """
+        :param user_id: Id of the user to get the token for.
+        :param su: Boolean to get a sudo token.
+
+        :return: dict including the token and expiration time.
+        """
+        key = (user_id, su is True)
+        now = time.monotonic()
+
+        token = self._tokens.get(key)
+
+        if token is None:
+            token = self.generate(user_id=user_id, su=su)
+            self._tokens.set(
+                key, token, now + token["expires_in"] - self.refresh_margin
+            )
+
+        return token
+
+    @property
+    def max_size(self):
+        return self._tokens.max_size
+
+    def clear(self):
+        self._tokens.clear()
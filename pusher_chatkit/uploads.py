@@ -0,0 +1,46 @@
+import mimetypes
+import os
+
+from functools import partial
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+class FileUpload(object):
+    def __init__(self, path, content_type=None, name=None, chunk_size=CHUNK_SIZE):
+        """
+        A file streamed from disk, chunk by chunk, when uploaded.
+
+        :param path: Path of the file on disk.
+        :param content_type: MIME type of the file. Guessed from the path if omitted.
+        :param name: Name of the attachment. Defaults to the file name.
+        :param chunk_size: Number of bytes read from disk at once.
+        """
+        self.path = path
+        self.content_type = (
+            content_type
+            or mimetypes.guess_type(path)[0]
+            or "application/octet-stream"
+        )
+        self.name = name or os.path.basename(path)
+        self.chunk_size = chunk_size
+        self.content_length = os.path.getsize(path)
+
+    def open(self):
+        return open(self.path, "rb")
+
+    def iter_chunks(self, fd):
+        """
+        :param fd: File object returned by `open`.
+
+        :return: Iterator over the file contents, `chunk_size` bytes at a time.
+        """
+        return iter(partial(fd.read, self.chunk_size), b"")
+
+    @property
+    def headers(self):
+        return {
+            "Content-Type": self.content_type,
+            "Content-Length": str(self.content_length),
+        }
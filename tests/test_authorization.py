@@ -0,0 +1,97 @@
+import unittest
+
+from pusher_chatkit.authorization import AuthorizationEngine
+from pusher_chatkit.concurrency import Parallel, run_steps
+from pusher_chatkit.events import notifies
+
+
+class StubChatKit(object):
+    _run = staticmethod(run_steps)
+
+    def __init__(self):
+        self.listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def list_all_roles(self):
+        return [
+            {"name": "admin", "scope": "global", "permissions": ["room:create"]},
+            {"name": "mod", "scope": "room"},
+        ]
+
+    def list_permissions_for_room_role(self, role_name):
+        return ["message:delete"]
+
+    def list_user_roles(self, user_id):
+        if user_id in ("alice", "carol"):
+            return [
+                {"role_name": "admin", "scope": "global"},
+                {"role_name": "mod", "scope": "room", "room_id": "general"},
+            ]
+
+        return []
+
+    @notifies
+    def assign_room_role_to_user(self, role_name, user_id, room_id):
+        return None
+
+
+def finish(steps, value):
+    """
+    Drives the rest of a steps generator, sending it `value` first.
+    """
+    while True:
+        try:
+            step = steps.send(value)
+        except StopIteration as stop:
+            return stop.value
+
+        value = step.run() if isinstance(step, Parallel) else step
+
+
+class AuthorizationEngineTest(unittest.TestCase):
+    def test_load(self):
+        engine = AuthorizationEngine(StubChatKit(), ["alice", "bob"])
+        engine.load()
+
+        self.assertTrue(engine.can("alice", None, "room:create"))
+        self.assertTrue(engine.can("alice", "general", "message:delete"))
+        self.assertFalse(engine.can("alice", "random", "message:delete"))
+        self.assertFalse(engine.can("bob", "general", "message:delete"))
+
+    def test_overlapping_loads_keep_their_pending_events(self):
+        chatkit = StubChatKit()
+        engine = AuthorizationEngine(chatkit, ["alice", "bob"])
+
+        # A background load fetches the assignments...
+        background = engine._load_steps({"alice", "bob"})
+        fetched = next(background).run()
+
+        # ...while a manual load completes, then bob gets a role.
+        engine.load()
+        chatkit.assign_room_role_to_user("mod", "bob", "general")
+
+        finish(background, fetched)
+
+        self.assertTrue(engine.can("bob", "general", "message:delete"))
+        self.assertEqual(engine._pending, {})
+
+    def test_users_loaded_during_a_load_are_kept(self):
+        engine = AuthorizationEngine(StubChatKit(), ["alice"])
+        engine.load()
+
+        background = engine._load_steps({"alice"})
+        fetched = next(background).run()
+
+        engine.load_user("carol")
+        self.assertTrue(engine.can("carol", "general", "message:delete"))
+
+        finish(background, fetched)
+
+        self.assertTrue(engine.can("carol", "general", "message:delete"))
+        self.assertEqual(engine.user_ids, {"alice", "carol"})
+
+
+if __name__ == "__main__":
+    unittest.main()
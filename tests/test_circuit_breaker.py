@@ -0,0 +1,107 @@
+import unittest
+
+from pusher_chatkit.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from pusher_chatkit.exceptions import (
+    PusherBadStatus,
+    PusherCircuitOpen,
+    PusherDeadlineExceeded,
+)
+
+
+def fail(error):
+    raise error
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_server_errors_open_the_circuit(self):
+        breaker = CircuitBreaker("api", failure_threshold=3)
+
+        for _ in range(3):
+            with self.assertRaises(PusherBadStatus):
+                breaker.call(fail, PusherBadStatus("503: down"))
+
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_deadlines_are_not_failures(self):
+        breaker = CircuitBreaker("api", failure_threshold=3)
+
+        for _ in range(10):
+            with self.assertRaises(PusherDeadlineExceeded):
+                breaker.call(fail, PusherDeadlineExceeded("deadline"))
+
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.failures, 0)
+        self.assertEqual(breaker.call(lambda: "ok"), "ok")
+
+    def open_breaker(self):
+        breaker = CircuitBreaker("api", failure_threshold=1, recovery_timeout=0)
+
+        with self.assertRaises(PusherBadStatus):
+            breaker.call(fail, PusherBadStatus("503: down"))
+
+        self.assertEqual(breaker.state, OPEN)
+
+        return breaker
+
+    def test_half_open_lets_a_single_probe_through(self):
+        breaker = self.open_breaker()
+        probe = breaker.before_call()
+
+        self.assertEqual(breaker.state, HALF_OPEN)
+
+        with self.assertRaises(PusherCircuitOpen):
+            breaker.before_call()
+
+        breaker.after_call(probe)
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.call(lambda: "ok"), "ok")
+
+    def test_failed_probe_opens_the_circuit_again(self):
+        breaker = self.open_breaker()
+
+        with self.assertRaises(PusherBadStatus):
+            breaker.call(fail, PusherBadStatus("503: still down"))
+
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_probe_running_out_of_time_leaves_the_circuit_half_open(self):
+        breaker = self.open_breaker()
+
+        with self.assertRaises(PusherDeadlineExceeded):
+            breaker.call(fail, PusherDeadlineExceeded("deadline"))
+
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertEqual(breaker.call(lambda: "ok"), "ok")
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_late_success_does_not_close_an_open_circuit(self):
+        breaker = CircuitBreaker("api", failure_threshold=1)
+        slow = breaker.before_call()
+
+        with self.assertRaises(PusherBadStatus):
+            breaker.call(fail, PusherBadStatus("503: down"))
+
+        breaker.after_call(slow)
+
+        self.assertEqual(breaker.state, OPEN)
+        self.assertEqual(breaker.in_flight, 0)
+
+    def test_late_completion_does_not_end_the_probe(self):
+        breaker = CircuitBreaker("api", failure_threshold=1, recovery_timeout=0)
+        slow = breaker.before_call()
+
+        with self.assertRaises(PusherBadStatus):
+            breaker.call(fail, PusherBadStatus("503: down"))
+
+        probe = breaker.before_call()
+        breaker.after_call(slow)
+
+        with self.assertRaises(PusherCircuitOpen):
+            breaker.before_call()
+
+        breaker.after_call(probe, PusherBadStatus("503: still down"))
+        self.assertEqual(breaker.state, OPEN)
+
+
+if __name__ == "__main__":
+    unittest.main()
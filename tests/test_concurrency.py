@@ -0,0 +1,53 @@
+import threading
+import time
+import unittest
+
+from concurrent.futures import ThreadPoolExecutor
+
+from pusher_chatkit.concurrency import run_concurrently
+
+
+class RunConcurrentlyTest(unittest.TestCase):
+    def test_shared_executor_bounds_concurrency_and_keeps_threads(self):
+        lock = threading.Lock()
+        in_flight = [0, 0]
+        threads = set()
+
+        def call(key):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight[1], in_flight[0])
+                threads.add(threading.get_ident())
+
+            time.sleep(0.01)
+
+            with lock:
+                in_flight[0] -= 1
+
+            return key
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in range(3):
+                calls = {key: (lambda key=key: call(key)) for key in range(12)}
+                results, errors = run_concurrently(
+                    calls, max_concurrency=3, executor=executor
+                )
+
+                self.assertEqual(results, {key: key for key in range(12)})
+                self.assertEqual(errors, {})
+
+        self.assertLessEqual(in_flight[1], 3)
+        self.assertLessEqual(len(threads), 8)
+
+    def test_errors_are_returned_per_key(self):
+        def fail():
+            raise ValueError("boom")
+
+        results, errors = run_concurrently({"ok": lambda: 1, "ko": fail})
+
+        self.assertEqual(results, {"ok": 1})
+        self.assertIsInstance(errors["ko"], ValueError)
+
+
+if __name__ == "__main__":
+    unittest.main()
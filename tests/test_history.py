@@ -0,0 +1,50 @@
+import unittest
+
+from pusher_chatkit.exceptions import PusherNotFound
+from pusher_chatkit.history import HistoryCache
+from pusher_chatkit.pusher_chatkit import PusherChatKit
+
+
+class StubBackend(object):
+    requests = []
+
+    def process_request(self, method, endpoint, body=None, token=None, **options):
+        self.requests.append(endpoint)
+
+        if "/rooms/missing/" in endpoint:
+            raise PusherNotFound("404: room not found")
+
+        return [{"id": len(self.requests), "text": endpoint}]
+
+
+class GetMessagesForRoomsTest(unittest.TestCase):
+    def setUp(self):
+        StubBackend.requests = []
+        self.chatkit = PusherChatKit("v1:us1:instance", "key:secret", backend=StubBackend)
+
+    def test_raises_the_first_error(self):
+        with self.assertRaises(PusherNotFound):
+            self.chatkit.get_messages_for_rooms(["general", "missing"])
+
+    def test_returns_errors_per_room(self):
+        messages, errors = self.chatkit.get_messages_for_rooms(
+            ["general", "missing", "random"], return_errors=True
+        )
+
+        self.assertEqual(set(messages), {"general", "random"})
+        self.assertEqual(set(errors), {"missing"})
+        self.assertIsInstance(errors["missing"], PusherNotFound)
+
+    def test_cached_rooms_are_not_fetched(self):
+        cache = HistoryCache(ttl=60)
+        rooms = {"general": 10, "random": 20}
+
+        first = self.chatkit.get_messages_for_rooms(rooms, cache=cache)
+        second = self.chatkit.get_messages_for_rooms(rooms, cache=cache)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(StubBackend.requests), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
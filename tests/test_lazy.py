@@ -0,0 +1,76 @@
+import json
+import unittest
+
+from unittest import mock
+
+from pusher_chatkit import lazy
+from pusher_chatkit.lazy import LazyList, iter_array
+
+
+ITEMS = [{"id": 1, "text": "héllo"}, 1.5, -20, 3e-2, True, None, "x", []]
+
+
+class IterArrayTest(unittest.TestCase):
+    def test_any_chunking(self):
+        raw = json.dumps(ITEMS).encode("utf8")
+
+        for size in (1, 2, 3, 7, len(raw)):
+            chunks = [raw[i:i + size] for i in range(0, len(raw), size)]
+            self.assertEqual(list(iter_array(chunks)), ITEMS, size)
+
+    def test_numbers_split_across_chunks(self):
+        self.assertEqual(list(iter_array([b"[1.", b"5, 2]"])), [1.5, 2])
+        self.assertEqual(list(iter_array(["[1", "e", "3, -", "2]"])), [1000.0, -2])
+
+    def test_malformed(self):
+        with self.assertRaises(ValueError):
+            list(iter_array(["[1 2]"]))
+
+        with self.assertRaises(ValueError):
+            list(iter_array(["[1,"]))
+
+
+class LazyListTest(unittest.TestCase):
+    def test_decodes_like_json(self):
+        items = LazyList(json.dumps(ITEMS).encode("utf8"))
+
+        self.assertEqual(items[1], 1.5)
+        self.assertEqual(items[:2], ITEMS[:2])
+        self.assertEqual(len(items), len(ITEMS))
+        self.assertEqual(items, ITEMS)
+
+    def test_any_whitespace(self):
+        for raw in (json.dumps(ITEMS, indent=2), " [ 1 ,2\n, [3] ] ", "[ ]"):
+            self.assertEqual(LazyList(raw), json.loads(raw), raw)
+
+    def test_malformed(self):
+        with self.assertRaises(ValueError):
+            list(LazyList("[1 2]"))
+
+        with self.assertRaises(ValueError):
+            len(LazyList('{"id": 1}'))
+
+    def test_items_are_decoded_once(self):
+        items = LazyList(json.dumps(ITEMS))
+
+        with mock.patch.object(
+            lazy._decoder, "raw_decode", wraps=lazy._decoder.raw_decode
+        ) as raw_decode:
+            self.assertEqual(items[3], ITEMS[3])
+            self.assertEqual(raw_decode.call_count, 4)
+
+            self.assertEqual(items[:4], ITEMS[:4])
+            self.assertEqual(raw_decode.call_count, 7)
+
+    def test_index_out_of_range(self):
+        items = LazyList("[1, 2]")
+
+        with self.assertRaises(IndexError):
+            items[2]
+
+        self.assertEqual(items[-2], 1)
+        self.assertEqual(list(items), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
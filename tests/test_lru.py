@@ -0,0 +1,31 @@
+import time
+import unittest
+
+from pusher_chatkit.lru import LRUCache
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_drops_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_expired_entries_are_missing(self):
+        cache = LRUCache()
+        cache.set("old", 1, time.monotonic() - 1)
+        cache.set("new", 2, time.monotonic() + 60)
+
+        self.assertEqual(cache.get("old", "default"), "default")
+        self.assertEqual(cache.get("new"), 2)
+        self.assertEqual(len(cache), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from pusher_chatkit.concurrency import run_steps
+from pusher_chatkit.membership import MembershipIndex
+
+
+class StubChatKit(object):
+    def __init__(self, rooms, user_rooms):
+        self.rooms = rooms
+        self.user_rooms = user_rooms
+        self.listeners = []
+
+    _run = staticmethod(run_steps)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def get_rooms(self, from_id=None, include_private=False):
+        return [room for room in self.rooms if room["id"] >= from_id][:2]
+
+    def get_user_rooms(self, user_id):
+        return self.user_rooms[user_id]
+
+
+class MembershipIndexTest(unittest.TestCase):
+    def test_add_remove_and_drop(self):
+        index = MembershipIndex()
+        index.add("a", ["u3", "u1", "u2", "u1"])
+        index.add("b", ["u2"])
+        index.add("a", ["u2"])
+
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.members("a"), {"u1", "u2", "u3"})
+        self.assertEqual(index.rooms_of("u2"), {"a", "b"})
+        self.assertTrue(index.is_member("u1", "a"))
+        self.assertFalse(index.is_member("u1", "b"))
+        self.assertFalse(index.is_member("nobody", "a"))
+
+        index.remove("a", ["u1", "nobody"])
+        self.assertEqual(index.members("a"), {"u2", "u3"})
+        self.assertEqual(index.rooms_of("u1"), set())
+
+        index.drop_room("a")
+        self.assertEqual(index.rooms_of("u2"), {"b"})
+        self.assertEqual(len(index), 1)
+
+    def test_load_adds_only_the_users_own_memberships(self):
+        chatkit = StubChatKit(
+            rooms=[
+                {"id": 1, "member_user_ids": ["u1", "u2"]},
+                {"id": 2, "member_user_ids": ["u2"]},
+                {"id": 3, "member_user_ids": ["u3"]},
+            ],
+            user_rooms={"u9": [{"id": 1, "member_user_ids": ["u1", "u2", "u9", "u8"]}]},
+        )
+
+        index = MembershipIndex(chatkit).load(["u9"])
+
+        self.assertEqual(index.members(1), {"u1", "u2", "u9"})
+        self.assertEqual(index.members(3), {"u3"})
+        self.assertEqual(index.rooms_of("u9"), {1})
+        self.assertEqual(len(index), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
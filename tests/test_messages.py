@@ -0,0 +1,58 @@
+import pickle
+import unittest
+
+from pusher_chatkit.messages import (
+    AttachmentMessage,
+    InlinePayload,
+    TextMessage,
+    UrlMessage,
+    encode_parts,
+)
+
+
+class MessagePartTest(unittest.TestCase):
+    def test_encoding(self):
+        parts = [
+            TextMessage("hello"),
+            UrlMessage("https://example.com/a.png", "image/png"),
+            AttachmentMessage("att-1", "image/png"),
+        ]
+
+        self.assertEqual(
+            encode_parts(parts),
+            b'{"parts":[{"type":"text/plain","content":"hello"},'
+            b'{"type":"image/png","url":"https://example.com/a.png"},'
+            b'{"type":"image/png","attachment":{"id":"att-1"}}]}',
+        )
+
+    def test_dict_bodies_are_frozen_copies(self):
+        body = {"id": "att-1", "tags": ["a"]}
+        payload = InlinePayload(body)
+
+        body["id"] = "att-2"
+        body["tags"].append("b")
+
+        self.assertEqual(payload.body, {"id": "att-1", "tags": ("a",)})
+
+    def test_attachment_bodies_cannot_change(self):
+        part = AttachmentMessage("att-1", "image/png")
+        encoded, hashed = part.as_json(), hash(part)
+
+        with self.assertRaises(TypeError):
+            part.payload.body["id"] = "att-2"
+
+        with self.assertRaises(TypeError):
+            part.payload.body.update(id="att-2")
+
+        self.assertEqual(part.as_json(), encoded)
+        self.assertEqual(hash(part), hashed)
+        self.assertEqual(part, AttachmentMessage("att-1", "image/png"))
+
+    def test_frozen_bodies_pickle(self):
+        part = AttachmentMessage("att-1", "image/png")
+
+        self.assertEqual(pickle.loads(pickle.dumps(part.payload.body)), {"id": "att-1"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from functools import partial
+
+from pusher_chatkit.migration import MigrationDriver
+
+
+class StubBackend(object):
+    def __init__(self, log_path):
+        self.log_path = log_path
+
+    def process_request(self, method, endpoint, body=None, token=None, **options):
+        if body["id"] == "crash":
+            os._exit(1)
+
+        with open(self.log_path, "a") as fd:
+            fd.write(json.dumps(body) + "\n")
+
+        return body
+
+
+def users(count, rooms=1):
+    return [
+        {"user_id": "u{}".format(i), "name": "room-{}".format(i % rooms)}
+        for i in range(count)
+    ]
+
+
+class MigrationDriverTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.directory, "log.ndjson")
+        self.checkpoint_path = os.path.join(self.directory, "checkpoint.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def driver(self, **options):
+        return MigrationDriver(
+            "v1:us1:instance",
+            "key:secret",
+            backend=partial(StubBackend, self.log_path),
+            checkpoint_path=self.checkpoint_path,
+            **options
+        )
+
+    def logged(self):
+        with open(self.log_path) as fd:
+            return [json.loads(line) for line in fd]
+
+    def checkpoint(self):
+        with open(self.checkpoint_path) as fd:
+            return json.load(fd)
+
+    def test_keeps_input_order_within_a_lane(self):
+        records = users(60, rooms=5)
+        report = self.driver(processes=2, chunk_size=3, ordered_by="name").run(
+            "create_user", records
+        )
+
+        self.assertEqual(report.succeeded, 60)
+
+        for room in {record["name"] for record in records}:
+            self.assertEqual(
+                [user["id"] for user in self.logged() if user["name"] == room],
+                [user["user_id"] for user in records if user["name"] == room],
+            )
+
+    def test_resumes_from_a_checkpoint_in_the_middle(self):
+        # Chunks 0, 1 and 3 of 5 completed in an earlier run.
+        with open(self.checkpoint_path, "w") as fd:
+            json.dump({"completed_before": 2, "completed": [3]}, fd)
+
+        report = self.driver(processes=1, chunk_size=2).run("create_user", users(10))
+
+        self.assertEqual(report.skipped_chunks, 3)
+        self.assertEqual(
+            sorted(user["id"] for user in self.logged()), ["u4", "u5", "u8", "u9"]
+        )
+        self.assertEqual(self.checkpoint(), {"completed_before": 5, "completed": []})
+
+    def test_failed_chunks_are_reported_and_not_checkpointed(self):
+        records = users(8)
+        records[4]["user_id"] = "crash"
+
+        report = self.driver(processes=1, chunk_size=2).run("create_user", records)
+
+        self.assertGreaterEqual(report.failed_chunks, 1)
+        self.assertIn(4, [number for number, _ in report.errors])
+        self.assertEqual(self.checkpoint(), {"completed_before": 2, "completed": []})
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            self.driver().run("create_users", users(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+from urllib.parse import parse_qs, urlparse
+
+from pusher_chatkit.exceptions import PusherPaginationError
+from pusher_chatkit.pusher_chatkit import PusherChatKit
+
+
+class StubBackend(object):
+    users = []
+    limits = []
+
+    def process_request(self, method, endpoint, body=None, token=None, **options):
+        query = {k: v[0] for k, v in parse_qs(urlparse(endpoint).query).items()}
+        limit = min(int(query.get("limit", 20)), 100)
+        self.limits.append(limit)
+
+        return [
+            user
+            for user in self.users
+            if user["created_at"] >= query.get("from_ts", "")
+        ][:limit]
+
+
+def users(created_at, count, first=0):
+    return [
+        {"id": "u{:03}".format(first + i), "created_at": created_at}
+        for i in range(count)
+    ]
+
+
+class IterUsersTest(unittest.TestCase):
+    def setUp(self):
+        StubBackend.limits = []
+        self.chatkit = PusherChatKit("v1:us1:instance", "key:secret", backend=StubBackend)
+
+    def test_pages_through_users(self):
+        StubBackend.users = users("2020-01-01", 3) + users("2020-01-02", 4, first=3)
+
+        self.assertEqual(
+            list(self.chatkit.iter_users(page_size=3)), StubBackend.users
+        )
+
+    def test_pages_past_a_full_page_sharing_one_timestamp(self):
+        StubBackend.users = users("2020-01-01", 5) + users("2020-01-02", 2, first=5)
+
+        self.assertEqual(
+            list(self.chatkit.iter_users(page_size=2)), StubBackend.users
+        )
+        self.assertEqual(StubBackend.limits, [2, 2, 4, 4, 8])
+
+    def test_raises_rather_than_skip_users(self):
+        StubBackend.users = users("2020-01-01", 150)
+
+        with self.assertRaises(PusherPaginationError):
+            list(self.chatkit.iter_users(page_size=100))
+
+
+if __name__ == "__main__":
+    unittest.main()
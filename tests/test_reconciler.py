@@ -0,0 +1,110 @@
+import unittest
+
+from pusher_chatkit.concurrency import run_steps
+from pusher_chatkit.reconciler import ASSIGNMENTS_PHASE, ROLES_PHASE, RoleReconciler
+
+
+class StubChatKit(object):
+    _run = staticmethod(run_steps)
+
+    def __init__(self):
+        self.calls = []
+
+    def list_all_roles(self):
+        return [
+            {"name": "admin", "scope": "global", "permissions": ["room:create"]},
+            {"name": "member", "scope": "room"},
+            {"name": "old", "scope": "room", "permissions": []},
+        ]
+
+    def list_permissions_for_room_role(self, role_name):
+        return ["message:create"]
+
+    def list_user_roles(self, user_id):
+        return {
+            "alice": [
+                {"role_name": "admin", "scope": "global"},
+                {"role_name": "member", "scope": "room", "room_id": "general"},
+                {"role_name": "member", "scope": "room", "room_id": "random"},
+            ],
+            "bob": [],
+        }[user_id]
+
+    def __getattr__(self, method):
+        def call(**kwargs):
+            self.calls.append((method, kwargs))
+
+        return call
+
+
+ROLES = [
+    {"name": "admin", "scope": "global", "permissions": ["room:create"]},
+    {"name": "member", "scope": "room", "permissions": ["message:create"]},
+    {"name": "mod", "scope": "room", "permissions": ["message:delete"]},
+]
+
+
+class RoleReconcilerTest(unittest.TestCase):
+    def test_plans_changes_to_existing_assignments(self):
+        plan = RoleReconciler(StubChatKit()).plan(
+            ROLES,
+            {
+                "alice": {"global": "admin", "rooms": {"general": "mod"}},
+                "bob": {"rooms": {"general": "member"}},
+            },
+            prune=True,
+        )
+
+        self.assertEqual(
+            sorted(str(change) for change in plan.changes),
+            [
+                "assign_room_role_to_user(role_name='member', room_id='general', "
+                "user_id='bob')",
+                "assign_room_role_to_user(role_name='mod', room_id='general', "
+                "user_id='alice')",
+                "create_room_role(permissions=['message:delete'], role_name='mod')",
+                "delete_room_role(role_name='old')",
+                "remove_room_role_to_user(role_name='member', room_id='random', "
+                "user_id='alice')",
+            ],
+        )
+
+    def test_up_to_date_assignments_need_no_changes(self):
+        plan = RoleReconciler(StubChatKit()).plan(
+            ROLES,
+            {
+                "alice": {
+                    "global": "admin",
+                    "rooms": {"general": "member", "random": "member"},
+                }
+            },
+        )
+
+        self.assertEqual(
+            [change.method for change in plan.changes], ["create_room_role"]
+        )
+
+    def test_reconcile_applies_phases_in_order(self):
+        chatkit = StubChatKit()
+        plan = RoleReconciler(chatkit).reconcile(
+            ROLES, {"alice": {"global": None, "rooms": {"general": "mod"}}}
+        )
+
+        self.assertEqual(plan.errors, [])
+        self.assertEqual(
+            [change.phase for change in plan.changes],
+            [ROLES_PHASE, ASSIGNMENTS_PHASE, ASSIGNMENTS_PHASE, ASSIGNMENTS_PHASE],
+        )
+        self.assertEqual(chatkit.calls[0][0], "create_room_role")
+        self.assertEqual(
+            sorted(method for method, _ in chatkit.calls[1:]),
+            [
+                "assign_room_role_to_user",
+                "remove_global_role_to_user",
+                "remove_room_role_to_user",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from functools import partial
+
+from pusher_chatkit.backends import RecordingBackend, ReplayBackend
+from pusher_chatkit.client import ValidatorCache, process_response
+from pusher_chatkit.exceptions import PusherBadStatus, PusherNotFound
+from pusher_chatkit.pusher_chatkit import PusherChatKit
+
+
+USER = b'{"id": "alice",  "name": "Alice"}'
+
+
+class StubBackend(object):
+    def process_request(self, method, endpoint, body=None, token=None, cache=None,
+                        timeout=None, lazy=False, on_response=None):
+        validators, cached = {}, None
+
+        if cache:
+            validators, cached = cache.validators(endpoint, token, lazy)
+
+        if endpoint.endswith("/users"):
+            status, headers, response = 201, {}, USER
+        elif endpoint.endswith("/users/alice"):
+            status, headers, response = 200, {"ETag": '"v1"'}, USER
+
+            if validators:
+                status, response = 304, b""
+        else:
+            status, headers, response = 404, {}, b'{"error": "not found"}'
+
+        if on_response:
+            on_response(status, headers, response)
+
+        if cache:
+            return cache.process_response(
+                endpoint, token, status, headers, response, lazy=lazy, cached=cached
+            )
+
+        return process_response(status, response, lazy=lazy)
+
+
+class RecordingTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "traffic.ndjson.gz")
+
+        chatkit = PusherChatKit(
+            "v1:us1:instance",
+            "key:secret",
+            backend=partial(RecordingBackend, StubBackend, self.path),
+            validator_cache=True,
+        )
+        chatkit.create_user("alice", "Alice")
+        chatkit.get_user("alice")
+        chatkit.get_user("alice")
+
+        with self.assertRaises(PusherNotFound):
+            chatkit.get_user("bob")
+
+        chatkit.client.http.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_records_raw_responses(self):
+        with gzip.open(self.path, "rt", encoding="utf8") as fd:
+            entries = [json.loads(line) for line in fd]
+
+        self.assertEqual([entry["status"] for entry in entries], [201, 200, 304, 404])
+        self.assertEqual(entries[0]["response"], USER.decode("utf8"))
+        self.assertEqual(entries[1]["headers"], {"ETag": '"v1"'})
+        self.assertEqual(entries[2]["response"], "")
+        self.assertEqual(entries[3]["response"], '{"error": "not found"}')
+
+    def test_replays_not_modified_from_the_validator_cache(self):
+        chatkit = PusherChatKit(
+            "v1:us1:instance",
+            "key:secret",
+            backend=partial(ReplayBackend, self.path),
+            validator_cache=True,
+        )
+
+        self.assertEqual(chatkit.create_user("alice", "Alice")["id"], "alice")
+        first = chatkit.get_user("alice")
+        second = chatkit.get_user("alice")
+
+        self.assertEqual(first, {"id": "alice", "name": "Alice"})
+        self.assertIs(second, first)
+
+        with self.assertRaises(PusherNotFound):
+            chatkit.get_user("bob")
+
+    def test_replays_not_modified_without_a_validator_cache(self):
+        chatkit = PusherChatKit(
+            "v1:us1:instance", "key:secret", backend=partial(ReplayBackend, self.path)
+        )
+
+        chatkit.create_user("alice", "Alice")
+
+        for _ in range(3):
+            self.assertEqual(chatkit.get_user("alice")["name"], "Alice")
+
+
+class ValidatorCacheTest(unittest.TestCase):
+    def test_not_modified_answers_with_the_validated_value(self):
+        cache = ValidatorCache(max_size=1)
+        cache.process_response("/a", None, 200, {"ETag": '"a"'}, b'{"a": 1}')
+        headers, cached = cache.validators("/a", None)
+
+        self.assertEqual(headers, {"If-None-Match": '"a"'})
+
+        # Evicted while the request is in flight.
+        cache.process_response("/b", None, 200, {"ETag": '"b"'}, b'{"b": 1}')
+
+        self.assertEqual(
+            cache.process_response("/a", None, 304, {}, b"", cached=cached), {"a": 1}
+        )
+
+    def test_unexpected_not_modified(self):
+        with self.assertRaises(PusherBadStatus):
+            ValidatorCache().process_response("/a", None, 304, {}, b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
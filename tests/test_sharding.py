@@ -0,0 +1,85 @@
+import unittest
+
+from urllib.parse import urlsplit
+
+from pusher_chatkit.sharding import ShardedPusherChatKit
+
+
+SHARDS = {
+    "one": ("v1:us1:instance-one", "key:secret"),
+    "two": ("v1:us1:instance-two", "key:secret"),
+    "three": ("v1:us1:instance-three", "key:secret"),
+}
+
+
+class StubBackend(object):
+    requests = []
+
+    def process_request(self, method, endpoint, body=None, token=None, **options):
+        instance = urlsplit(endpoint).path.split("/")[4]
+        self.requests.append((instance, method, endpoint))
+
+        return {"id": "room-{}".format(len(self.requests))}
+
+
+def tenant_of(method_name, arguments):
+    return arguments.get("tenant_id")
+
+
+class RoutingTest(unittest.TestCase):
+    def setUp(self):
+        StubBackend.requests = []
+        self.chatkit = ShardedPusherChatKit(SHARDS, backend=StubBackend)
+
+    def instances(self):
+        return [instance for instance, _, _ in StubBackend.requests]
+
+    def test_scoped_call_without_tenant_key_raises(self):
+        with self.assertRaises(ValueError):
+            self.chatkit.create_room("general", "alice")
+
+        with self.assertRaises(ValueError):
+            self.chatkit.get_room("42")
+
+        with self.assertRaises(ValueError):
+            self.chatkit.broadcast_message("alice", ["1", "2"], [])
+
+        self.assertEqual(StubBackend.requests, [])
+
+    def test_room_members_and_messages_share_the_tenant_shard(self):
+        for tenant in range(50):
+            StubBackend.requests = []
+            key = "tenant-{}".format(tenant)
+
+            room = self.chatkit.create_room("general", "alice", shard_key=key)
+            self.chatkit.get_room(room["id"], shard_key=key)
+            self.chatkit.add_users_to_room(room["id"], ["bob"], shard_key=key)
+            self.chatkit.send_message("bob", room["id"], "hi", shard_key=key)
+
+            self.assertEqual(len(set(self.instances())), 1)
+
+    def test_key_func_routes_calls(self):
+        chatkit = ShardedPusherChatKit(
+            SHARDS, backend=StubBackend, key_func=lambda method, arguments: "tenant-7"
+        )
+
+        chatkit.create_user("alice", "Alice")
+        chatkit.get_room("42")
+
+        self.assertEqual(len(set(self.instances())), 1)
+
+    def test_key_func_returning_none_raises(self):
+        chatkit = ShardedPusherChatKit(SHARDS, backend=StubBackend, key_func=tenant_of)
+
+        with self.assertRaises(ValueError):
+            chatkit.get_room("42")
+
+    def test_fan_out_reaches_every_shard(self):
+        results = self.chatkit.get_users()
+
+        self.assertEqual(set(results), set(SHARDS))
+        self.assertEqual(len(set(self.instances())), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pusher_chatkit.messages import AttachmentMessage
+from pusher_chatkit.pusher_chatkit import PusherChatKit
+from pusher_chatkit.uploads import FileUpload
+
+
+class StubBackend(object):
+    requests = []
+    uploads = []
+
+    def process_request(self, method, endpoint, body=None, token=None, **options):
+        self.requests.append((method, endpoint, body))
+
+        return {"attachment_id": "att-1", "upload_url": "https://storage/upload/att-1"}
+
+    def process_upload(self, url, upload, timeout=None):
+        with upload.open() as fd:
+            chunks = [len(chunk) for chunk in upload.iter_chunks(fd)]
+
+        self.uploads.append((url, upload.headers, chunks, timeout))
+
+
+class UploadAttachmentTest(unittest.TestCase):
+    def setUp(self):
+        StubBackend.requests = []
+        StubBackend.uploads = []
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "photo.png")
+
+        with open(self.path, "wb") as fd:
+            fd.write(os.urandom(10000))
+
+        self.chatkit = PusherChatKit(
+            "v1:us1:instance", "key:secret", backend=StubBackend
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_streams_the_file_in_chunks(self):
+        part = self.chatkit.upload_attachment(
+            "alice", "general", FileUpload(self.path, chunk_size=4096)
+        )
+
+        self.assertEqual(part, AttachmentMessage("att-1", "image/png"))
+        self.assertEqual(
+            part.as_dict(), {"type": "image/png", "attachment": {"id": "att-1"}}
+        )
+
+        [(method, endpoint, body)] = StubBackend.requests
+        self.assertEqual(method, "POST")
+        self.assertTrue(endpoint.endswith("/rooms/general/attachments"))
+        self.assertEqual(
+            body,
+            {"content_type": "image/png", "content_length": 10000, "name": "photo.png"},
+        )
+
+        [(url, headers, chunks, timeout)] = StubBackend.uploads
+        self.assertEqual(url, "https://storage/upload/att-1")
+        self.assertEqual(headers["Content-Length"], "10000")
+        self.assertEqual(chunks, [4096, 4096, 1808])
+        self.assertIsNone(timeout)
+
+    def test_deadline_bounds_the_upload(self):
+        self.chatkit.upload_attachment("alice", "general", self.path, deadline=5)
+
+        [(_, _, _, timeout)] = StubBackend.uploads
+        self.assertTrue(0 < timeout <= 5)
+
+
+if __name__ == "__main__":
+    unittest.main()